@@ -0,0 +1,43 @@
+"""Periodic background flushing for in-memory state kept by workers."""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher(ABC):
+    """Calls `flush()` every `interval` seconds in a daemon thread, and once on stop"""
+
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Write out whatever has been buffered since the last call"""
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"{self.name} flush failed: {e}", exc_info=True)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and flush whatever is still buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
@@ -0,0 +1,48 @@
+"""Set-based bulk UPDATE/DELETE helpers used by the admin bulk endpoints.
+
+Each call runs one statement per batch of ids (or a single statement for a
+pure filter) inside one transaction and returns the affected row count.
+"""
+from typing import Iterator, List, Optional
+from sqlalchemy.orm import Session
+from . import schemas
+
+# Keeps every statement well below SQLite's bound-parameter limit
+ID_BATCH_SIZE = 500
+
+
+def _id_batches(ids: Optional[List[int]]) -> Iterator[Optional[List[int]]]:
+    if not ids:
+        yield None
+        return
+    unique_ids = sorted(set(ids))
+    for start in range(0, len(unique_ids), ID_BATCH_SIZE):
+        yield unique_ids[start:start + ID_BATCH_SIZE]
+
+
+def _selection_query(db: Session, model, selection: schemas.BulkSelection, id_batch: Optional[List[int]]):
+    query = db.query(model)
+    if id_batch is not None:
+        query = query.filter(model.id.in_(id_batch))
+    if selection.filter is not None:
+        for field, value in selection.filter.model_dump(exclude_none=True).items():
+            query = query.filter(getattr(model, field) == value)
+    return query
+
+
+def bulk_update(db: Session, model, selection: schemas.BulkSelection, values: dict) -> int:
+    """UPDATE the selected rows with `values`, return how many matched"""
+    affected = 0
+    for id_batch in _id_batches(selection.ids):
+        affected += _selection_query(db, model, selection, id_batch).update(values, synchronize_session=False)
+    db.commit()
+    return affected
+
+
+def bulk_delete(db: Session, model, selection: schemas.BulkSelection) -> int:
+    """DELETE the selected rows, return how many were removed"""
+    affected = 0
+    for id_batch in _id_batches(selection.ids):
+        affected += _selection_query(db, model, selection, id_batch).delete(synchronize_session=False)
+    db.commit()
+    return affected
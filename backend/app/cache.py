@@ -0,0 +1,279 @@
+"""In-process read-through cache for public catalog responses.
+
+Entries hold already serialized JSON bodies, grouped by namespace
+("products", "categories", ...). Commits touching the underlying models
+invalidate the affected namespaces through `app.signals`. Each worker process
+has its own cache; the TTL bounds staleness caused by writes in other workers.
+
+Cached payloads carry a strong ETag and a Last-Modified date, so conditional
+requests are answered with 304 straight from the cache entry. Last-Modified is
+never older than the namespace's last invalidation, so it also moves forward
+when rows disappear from a listing (deletes, deactivation).
+"""
+import dataclasses
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from .database import get_settings
+from .image_refs import image_references
+from . import models, signals
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    """A serialized response body (JSON unless `media_type` says otherwise) plus its headers"""
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    media_type: str = "application/json"
+
+    def is_fresh_for(self, request: Request) -> bool:
+        """True when the client's conditional headers match this payload"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if self.etag is None:
+                return False
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == self.etag for tag in tags)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+    def to_response(self, request: Optional[Request] = None, cache_control: Optional[str] = None) -> Response:
+        headers = dict(self.headers)
+        if self.etag:
+            headers["ETag"] = self.etag
+        if self.last_modified:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        if cache_control:
+            headers["Cache-Control"] = cache_control
+
+        if request is not None and request.method in ("GET", "HEAD") and self.is_fresh_for(request):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
+
+
+class CatalogCache:
+    """Bounded LRU cache with a per-entry TTL and a total size limit"""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, CachedPayload]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        # Namespaces never invalidated by this worker count as changed at startup
+        self._started_at = datetime.now(timezone.utc)
+        self._changed_at: Dict[str, datetime] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def changed_at(self, namespace: str) -> datetime:
+        """When `namespace` was last invalidated in this worker"""
+        return self._changed_at.get(namespace, self._started_at)
+
+    def get(self, namespace: str, key: Hashable) -> Optional[CachedPayload]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                self._remove((namespace, key))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return payload
+
+    def set(self, namespace: str, key: Hashable, payload: CachedPayload, generation: Optional[int] = None) -> None:
+        size = len(payload.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # Skip results computed before a concurrent invalidation
+            if generation is not None and generation != self.generation(namespace):
+                return
+            if (namespace, key) in self._entries:
+                self._remove((namespace, key))
+            self._entries[(namespace, key)] = (time.monotonic() + self.ttl_seconds, payload)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, *namespaces: str) -> None:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self.generation(namespace) + 1
+                self._changed_at[namespace] = now
+                for entry_key in [k for k in self._entries if k[0] == namespace]:
+                    self._remove(entry_key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, entry_key) -> None:
+        _, payload = self._entries.pop(entry_key)
+        self._size -= len(payload.body)
+
+
+catalog_cache = CatalogCache(
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    ttl_seconds=settings.cache_ttl_seconds,
+)
+
+
+def make_key(*args, **params) -> Hashable:
+    """Normalize request parameters into a cache key (unset params are ignored)"""
+    return args + tuple(sorted((name, value) for name, value in params.items() if value is not None))
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; server-side timestamps are UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def last_modified_of(data) -> Optional[datetime]:
+    """Latest updated_at/created_at among the given ORM rows and their embedded image metadata"""
+    rows = data if isinstance(data, (list, tuple)) else [data]
+    stamps = [
+        _as_utc(stamp)
+        for row in rows
+        for source in (row, getattr(row, "image_meta", None))
+        for stamp in (getattr(source, "updated_at", None), getattr(source, "created_at", None))
+        if isinstance(stamp, datetime)
+    ]
+    return max(stamps) if stamps else None
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def render(schema, data, headers: Optional[Dict[str, str]] = None) -> CachedPayload:
+    """Validate ORM data against `schema` and serialize it to JSON once"""
+    adapter = _adapter(schema)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return CachedPayload(
+        body=body,
+        headers=headers or {},
+        etag=etag_for(body),
+        last_modified=last_modified_of(data),
+    )
+
+
+def cached_response(
+    namespace: str,
+    key: Hashable,
+    build: Callable[[], CachedPayload],
+    request: Optional[Request] = None,
+    cache_control: Optional[str] = None,
+) -> Response:
+    """Serve `key` from the cache, calling `build()` to fill it on a miss.
+
+    With `request` given, matching If-None-Match / If-Modified-Since headers
+    get a bodiless 304 response.
+    """
+    return cached_payload(namespace, key, build).to_response(request, cache_control)
+
+
+def cached_payload(namespace: str, key: Hashable, build: Callable[[], CachedPayload]) -> CachedPayload:
+    """Return the cached payload for `key`, calling `build()` to fill it on a miss"""
+    payload = catalog_cache.get(namespace, key)
+    if payload is None:
+        generation = catalog_cache.generation(namespace)
+        changed_at = catalog_cache.changed_at(namespace)
+        payload = build()
+        if payload.last_modified is None or payload.last_modified < changed_at:
+            payload = dataclasses.replace(payload, last_modified=changed_at)
+        catalog_cache.set(namespace, key, payload, generation)
+    return payload
+
+
+# Namespaces whose payloads embed data from each model
+INVALIDATES = {
+    models.Product: ("products", "pages"),
+    models.Category: ("categories", "products", "pages"),
+    models.Certificate: ("certificates", "pages"),
+    models.PageSection: ("content", "pages"),
+    models.SiteSettings: ("settings", "pages"),
+    models.News: ("news", "pages"),
+}
+
+
+def _invalidator(namespaces):
+    def receiver(ids):
+        catalog_cache.invalidate(*namespaces)
+    return receiver
+
+
+def _invalidate_image_references(ids) -> None:
+    # Image metadata is embedded in product and news payloads: only the namespaces
+    # of rows showing a changed image are affected
+    namespaces = {namespace for model in image_references(ids) for namespace in INVALIDATES[model]}
+    if namespaces:
+        catalog_cache.invalidate(*sorted(namespaces))
+
+
+for _model, _namespaces in INVALIDATES.items():
+    signals.connect(_model, _invalidator(_namespaces))
+signals.connect(models.Media, _invalidate_image_references)
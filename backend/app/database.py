@@ -4,6 +4,7 @@ from sqlalchemy.orm import sessionmaker
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from functools import lru_cache
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -13,6 +14,60 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 60 * 24 * 7  # 7 days
     upload_dir: str = "uploads"
     max_file_size: int = 10 * 1024 * 1024  # 10MB
+    # WebP derivatives made for every uploaded image
+    image_derivative_widths: List[int] = [320, 640, 1024, 1600]
+    image_webp_quality: int = 80
+    image_workers: int = 2
+    # Longest side, in pixels, of the inline placeholder stored per image
+    image_placeholder_size: int = 16
+    # GET /api/media/image/{filename}: allowed sizes and the variant disk cache
+    image_resize_widths: List[int] = [160, 320, 480, 640, 800, 1024, 1280, 1600]
+    image_resize_heights: List[int] = [160, 320, 480, 640, 800, 1024, 1280, 1600]
+    image_cache_dir: str = "image_cache"
+    image_cache_max_bytes: int = 512 * 1024 * 1024
+    cache_control_images: str = "public, max-age=31536000, immutable"
+    # /uploads files whose names are not content hashes (those get cache_control_images)
+    cache_control_uploads: str = "public, max-age=86400"
+    cache_max_entries: int = 1024
+    cache_max_bytes: int = 32 * 1024 * 1024  # 32MB
+    cache_ttl_seconds: int = 300
+    # Cache-Control sent with public catalog responses, per router
+    cache_control_products: str = "public, no-cache"
+    cache_control_categories: str = "public, no-cache"
+    cache_control_certificates: str = "public, no-cache"
+    cache_control_content: str = "public, no-cache"
+    cache_control_settings: str = "public, no-cache"
+    # Fuzzy product search: share of query trigrams a name must contain
+    search_fuzzy_threshold: float = 0.5
+    # How often the in-memory name indexes check for writes from other workers
+    search_index_refresh_seconds: int = 30
+    # Buffered news view counts are written this often
+    news_views_flush_seconds: float = 5.0
+    # Trending news: views lose half their weight every half-life
+    trending_half_life_hours: float = 24.0
+    trending_snapshot_seconds: float = 60.0
+    # Scheduled news: full re-read of upcoming articles (catches other workers)
+    news_schedule_reload_seconds: float = 300.0
+    # Public website address used in feeds and sitemaps
+    site_url: str = "https://enrich.uz"
+    feeds_dir: str = "feeds"
+    feeds_check_seconds: float = 60.0
+    sitemap_chunk_size: int = 50000
+    rss_items: int = 50
+    cache_control_feeds: str = "public, max-age=300"
+    cache_control_pages: str = "public, no-cache"
+    # Version stamp shared by workers to notice SiteSettings edits
+    site_settings_version_file: str = "site_settings.version"
+    # Pre-rendered public JSON, served at /snapshots
+    snapshots_dir: str = "snapshots"
+    # Collections embedded in GET /api/pages/{page_path}/bundle, per page
+    page_collections: Dict[str, List[str]] = {
+        "home": ["featured_products", "latest_news"],
+        "products": ["categories"],
+        "news": ["latest_news"],
+        "about": ["certificates"],
+        "laboratory": ["certificates"],
+    }
     allowed_origins: str = "http://localhost:3000,http://localhost:3001,http://127.0.0.1:3000,http://127.0.0.1:3001,http://enrich.uz,https://enrich.uz,http://www.enrich.uz,https://www.enrich.uz"
     telegram_bot_token: str = Field(default="", validation_alias="TELEGRAM_BOT_TOKEN")
     telegram_chat_id: str = Field(default="", validation_alias="TELEGRAM_CHAT_ID")
@@ -0,0 +1,283 @@
+"""RSS feed and sitemap files for crawlers.
+
+Files are generated into `settings.feeds_dir` and served from there with an
+ETag. Sitemaps follow the sitemap protocol: ``sitemap.xml`` is an index that
+points at chunk files, each covering a fixed id range of news or products
+(at most `sitemap_chunk_size` URLs). Every file records the signature of the
+rows it was built from (count, max id, last change) in ``manifest.json``, so a
+change only rewrites the chunks, index and feed it actually affects.
+
+Commits in this process mark the files stale through `app.signals`; changes
+made by other workers are noticed by re-checking the signatures every
+`feeds_check_seconds`.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .cache import CachedPayload, etag_for
+from .database import get_settings
+from . import models, signals
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+MANIFEST = "manifest.json"
+SITEMAP_INDEX = "sitemap.xml"
+NEWS_RSS = "news.rss"
+PAGES_SITEMAP = "sitemap-pages.xml"
+
+# Public pages of the website that are not backed by a row
+STATIC_PAGES = ["/", "/about", "/products", "/news", "/laboratory", "/partners", "/contact"]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _w3c_date(value: Optional[datetime]) -> Optional[str]:
+    value = _as_utc(value)
+    return value.strftime("%Y-%m-%dT%H:%M:%S+00:00") if value else None
+
+
+def _xml_bytes(root: ET.Element) -> bytes:
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+class FeedBuilder:
+    """Keeps the feed and sitemap files in `directory` up to date"""
+
+    def __init__(self, directory: str, site_url: str, chunk_size: int, rss_items: int, check_seconds: float):
+        self.directory = directory
+        self.site_url = site_url.rstrip("/")
+        self.chunk_size = chunk_size
+        self.rss_items = rss_items
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._stale = True
+        self._checked_at = 0.0
+        self._manifest: Dict[str, dict] = {}
+        self._payloads: Dict[str, CachedPayload] = {}
+
+    def mark_changed(self, ids) -> None:
+        self._stale = True
+
+    # ----- files -----
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self._path(MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_atomic(self, name: str, content: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _store(self, manifest: Dict[str, dict], name: str, content: bytes, signature: str,
+               last_modified: Optional[datetime]) -> None:
+        self._write_atomic(name, content)
+        manifest[name] = {
+            "signature": signature,
+            "etag": etag_for(content),
+            "last_modified": _w3c_date(last_modified or datetime.now(timezone.utc)),
+        }
+
+    def _is_current(self, manifest: Dict[str, dict], name: str, signature: str) -> bool:
+        entry = manifest.get(name)
+        return entry is not None and entry["signature"] == signature and os.path.exists(self._path(name))
+
+    # ----- content -----
+
+    def _url(self, loc: str, lastmod: Optional[datetime]) -> ET.Element:
+        url = ET.Element(f"{{{SITEMAP_NS}}}url")
+        ET.SubElement(url, f"{{{SITEMAP_NS}}}loc").text = f"{self.site_url}{loc}"
+        if lastmod is not None:
+            ET.SubElement(url, f"{{{SITEMAP_NS}}}lastmod").text = _w3c_date(lastmod)
+        return url
+
+    def _urlset(self, urls) -> bytes:
+        ET.register_namespace("", SITEMAP_NS)
+        root = ET.Element(f"{{{SITEMAP_NS}}}urlset")
+        root.extend(urls)
+        return _xml_bytes(root)
+
+    def _chunk_groups(self, db: Session, model, condition):
+        """Signature of every id-range chunk of `model` rows matching `condition`"""
+        chunk = (model.id // self.chunk_size).label("chunk")
+        changed = func.max(func.coalesce(model.updated_at, model.created_at))
+        rows = db.query(chunk, func.count(model.id), func.max(model.id), changed).filter(condition).group_by(chunk)
+        return {number: (count, max_id, changed_at) for number, count, max_id, changed_at in rows}
+
+    def _news_chunk(self, db: Session, number: int) -> bytes:
+        N = models.News
+        rows = db.query(N.slug, N.id, N.updated_at, N.created_at).filter(
+            N.is_published == True,
+            N.id >= number * self.chunk_size,
+            N.id < (number + 1) * self.chunk_size,
+        ).order_by(N.id)
+        return self._urlset(self._url(f"/news/{slug or news_id}", updated or created)
+                            for slug, news_id, updated, created in rows)
+
+    def _product_chunk(self, db: Session, number: int) -> bytes:
+        P = models.Product
+        rows = db.query(P.slug, P.id, P.updated_at, P.created_at).filter(
+            P.is_active == True,
+            P.id >= number * self.chunk_size,
+            P.id < (number + 1) * self.chunk_size,
+        ).order_by(P.id)
+        return self._urlset(self._url(f"/products/{slug or product_id}", updated or created)
+                            for slug, product_id, updated, created in rows)
+
+    def _news_rss(self, db: Session) -> bytes:
+        N = models.News
+        site = db.query(models.SiteSettings.site_name_ru).first()
+        title = (site[0] if site and site[0] else None) or "ENRICH"
+
+        rss = ET.Element("rss", version="2.0")
+        channel = ET.SubElement(rss, "channel")
+        ET.SubElement(channel, "title").text = f"{title}: новости"
+        ET.SubElement(channel, "link").text = f"{self.site_url}/news"
+        ET.SubElement(channel, "description").text = title
+        ET.SubElement(channel, "language").text = "ru"
+
+        articles = db.query(N).filter(N.is_published == True).order_by(
+            N.published_date.desc().nulls_last(), N.id.desc()
+        ).limit(self.rss_items)
+        for article in articles:
+            link = f"{self.site_url}/news/{article.slug or article.id}"
+            item = ET.SubElement(channel, "item")
+            ET.SubElement(item, "title").text = article.title_ru
+            ET.SubElement(item, "link").text = link
+            ET.SubElement(item, "guid", isPermaLink="true").text = link
+            published = _as_utc(article.published_date or article.created_at)
+            if published is not None:
+                ET.SubElement(item, "pubDate").text = format_datetime(published)
+            if article.excerpt_ru:
+                ET.SubElement(item, "description").text = article.excerpt_ru
+        return _xml_bytes(rss)
+
+    # ----- refresh -----
+
+    def _refresh(self, db: Session) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Start from the manifest on disk: another worker may have written newer files
+        manifest = self._load_manifest()
+        wanted = {MANIFEST}
+
+        sections = [
+            ("news", self._chunk_groups(db, models.News, models.News.is_published == True), self._news_chunk),
+            ("products", self._chunk_groups(db, models.Product, models.Product.is_active == True),
+             self._product_chunk),
+        ]
+        chunk_names = [PAGES_SITEMAP]
+        signature = f"{self.site_url}|{','.join(STATIC_PAGES)}"
+        if not self._is_current(manifest, PAGES_SITEMAP, signature):
+            self._store(manifest, PAGES_SITEMAP, self._urlset(self._url(page, None) for page in STATIC_PAGES),
+                        signature, None)
+
+        for prefix, groups, build in sections:
+            for number, group in sorted(groups.items()):
+                name = f"sitemap-{prefix}-{number}.xml"
+                chunk_names.append(name)
+                signature = f"{self.site_url}|{group[0]}|{group[1]}|{group[2]}"
+                if not self._is_current(manifest, name, signature):
+                    self._store(manifest, name, build(db, number), signature, group[2])
+                    logger.info(f"Regenerated {name}")
+
+        # The index changes whenever one of its chunks does
+        signature = "|".join(f"{name}={manifest[name]['etag']}" for name in chunk_names)
+        if not self._is_current(manifest, SITEMAP_INDEX, signature):
+            ET.register_namespace("", SITEMAP_NS)
+            index = ET.Element(f"{{{SITEMAP_NS}}}sitemapindex")
+            for name in chunk_names:
+                entry = ET.SubElement(index, f"{{{SITEMAP_NS}}}sitemap")
+                ET.SubElement(entry, f"{{{SITEMAP_NS}}}loc").text = f"{self.site_url}/api/sitemaps/{name}"
+                ET.SubElement(entry, f"{{{SITEMAP_NS}}}lastmod").text = manifest[name]["last_modified"]
+            self._store(manifest, SITEMAP_INDEX, _xml_bytes(index), signature, None)
+
+        news = list(sections[0][1].values())
+        news_changed = max((g[2] for g in news if g[2] is not None), default=None)
+        signature = f"{self.site_url}|{sum(g[0] for g in news)}|{max((g[1] for g in news), default=0)}|{news_changed}"
+        if not self._is_current(manifest, NEWS_RSS, signature):
+            self._store(manifest, NEWS_RSS, self._news_rss(db), signature, news_changed)
+
+        wanted.update(chunk_names + [SITEMAP_INDEX, NEWS_RSS])
+        for name in list(manifest):
+            if name not in wanted:
+                manifest.pop(name)
+                try:
+                    os.unlink(self._path(name))
+                except OSError:
+                    pass
+
+        self._write_atomic(MANIFEST, json.dumps(manifest, indent=2).encode("utf-8"))
+        self._manifest = manifest
+
+    def ensure_current(self, db: Session) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not self._stale and now - self._checked_at < self.check_seconds:
+                return
+            self._stale = False
+            self._checked_at = now
+            try:
+                self._refresh(db)
+            except Exception:
+                self._stale = True
+                raise
+
+    def payload(self, db: Session, name: str, media_type: str) -> Optional[CachedPayload]:
+        """The current contents of file `name`, or None if there is no such file"""
+        self.ensure_current(db)
+        entry = self._manifest.get(name)
+        if entry is None or name == MANIFEST:
+            return None
+        cached = self._payloads.get(name)
+        if cached is not None and cached.etag == entry["etag"]:
+            return cached
+        with open(self._path(name), "rb") as f:
+            body = f.read()
+        cached = CachedPayload(
+            body=body,
+            # Hash what was read: another worker may have replaced the file since
+            etag=etag_for(body),
+            last_modified=datetime.fromisoformat(entry["last_modified"]),
+            media_type=media_type,
+        )
+        self._payloads[name] = cached
+        return cached
+
+
+feeds = FeedBuilder(
+    directory=settings.feeds_dir,
+    site_url=settings.site_url,
+    chunk_size=settings.sitemap_chunk_size,
+    rss_items=settings.rss_items,
+    check_seconds=settings.feeds_check_seconds,
+)
+
+signals.connect(models.News, feeds.mark_changed)
+signals.connect(models.Product, feeds.mark_changed)
@@ -0,0 +1,263 @@
+"""Typo- and transliteration-tolerant product name search.
+
+Product names in every language are folded into one Latin "sound-alike" form
+(Cyrillic Russian/Uzbek and the usual Latin spellings of the same words end
+up identical), split into character trigrams and kept in an in-memory
+inverted index. Queries are matched by trigram overlap and ranked by edit
+distance, entirely in-process.
+"""
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from .database import get_settings
+from .name_index import ProductNameIndex
+
+_CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "x", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    # Uzbek Cyrillic
+    "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+}
+
+# Applied in order to the transliterated text; "sh"/"ch" become the letters
+# freed up by the later rules so every sound is a single character.
+_LATIN_FOLDS = [
+    ("sh", "w"),
+    ("ch", "c"),
+    ("zh", "j"),
+    ("kh", "h"),
+    ("ph", "f"),
+    ("ts", "s"),
+    ("x", "h"),
+    ("q", "k"),
+]
+_SOFT_C = re.compile(r"c(?=[eiy])")
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+# Doubled letters are a common typo; digits stay as written (500 is not 50)
+_REPEATS = re.compile(r"([^\W\d_])\1+")
+
+
+def normalize(text: str) -> str:
+    """Fold a name or query into its transliterated, typo-tolerant form"""
+    text = text.lower()
+    # Drop apostrophes first so o'z / oʻz / o‘z all become "oz"
+    text = re.sub(r"['`ʻʼ‘’´]", "", text)
+    text = "".join(_CYRILLIC_TO_LATIN.get(ch, ch) for ch in text)
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    # A Latin "c" is an "s" before e/i/y and a "k" elsewhere (paracetamol)
+    text = _SOFT_C.sub("s", text.replace("ch", "\x00"))
+    text = text.replace("c", "k").replace("\x00", "ch")
+    for source, target in _LATIN_FOLDS:
+        text = text.replace(source, target)
+    text = _NON_WORD.sub(" ", text)
+    text = _REPEATS.sub(r"\1", text)
+    return " ".join(text.split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Word-padded character trigrams of a normalized string"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _char_masks(pattern: str) -> Dict[str, int]:
+    """Bit i of a character's mask is set where pattern[i] is that character"""
+    masks: Dict[str, int] = {}
+    for i, ch in enumerate(pattern):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+def _distance_with_masks(masks: Dict[str, int], length: int, text: str) -> int:
+    """Levenshtein distance from the pattern behind `masks` to `text`.
+
+    Bit-parallel (Myers/Hyyrö): one step of integer operations per character
+    of `text` instead of a row of the dynamic-programming table.
+    """
+    if not length:
+        return len(text)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative, score = full, 0, length
+    for ch in text:
+        match = masks.get(ch, 0)
+        vertical = match | negative
+        horizontal = (((match & positive) + positive) ^ positive) | match
+        plus = negative | (~(horizontal | positive) & full)
+        minus = positive & horizontal
+        if plus & last:
+            score += 1
+        elif minus & last:
+            score -= 1
+        plus = ((plus << 1) | 1) & full
+        minus = (minus << 1) & full
+        positive = minus | (~(vertical | plus) & full)
+        negative = plus & vertical
+    return score
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings"""
+    return _distance_with_masks(_char_masks(a), len(a), b)
+
+
+def _best_window_distance(query: str, name: str, masks: Dict[str, int], bound: int) -> int:
+    """Smallest edit distance between the query and a same-length run of name words.
+
+    Windows whose length alone puts them further than `bound` away are not
+    compared; if none is left the result is just some distance above `bound`.
+    """
+    query_words = query.split()
+    name_words = name.split()
+    size = len(query_words)
+    if len(name_words) <= size:
+        windows = [name]
+    else:
+        windows = [" ".join(name_words[start:start + size]) for start in range(len(name_words) - size + 1)]
+    best = bound + 1
+    for window in windows:
+        if abs(len(window) - len(query)) < best:
+            best = min(best, _distance_with_masks(masks, len(query), window))
+    return best
+
+
+class FuzzyProductIndex(ProductNameIndex):
+    """Inverted trigram index over normalized product names"""
+
+    # Strongest trigram matches ranked by edit distance, at least. Pages that
+    # end within it are cut from the same ranking, so they never overlap.
+    shortlist_size = 100
+
+    def _clear(self) -> None:
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        # doc id -> (product id, normalized name, trigram set)
+        self._docs: Dict[int, Tuple[int, str, Set[str]]] = {}
+        self._docs_by_product: Dict[int, List[int]] = defaultdict(list)
+        self._next_doc = 0
+
+    def _add(self, row) -> None:
+        product_id, *names = row
+        seen = set()
+        for name in names:
+            normalized = normalize(name) if name else ""
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            grams = trigrams(normalized)
+            doc = self._next_doc
+            self._next_doc += 1
+            self._docs[doc] = (product_id, normalized, grams)
+            self._docs_by_product[product_id].append(doc)
+            for gram in grams:
+                self._postings[gram].add(doc)
+
+    def _remove(self, product_id: int) -> None:
+        for doc in self._docs_by_product.pop(product_id, []):
+            _, _, grams = self._docs.pop(doc)
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(doc)
+                    if not postings:
+                        del self._postings[gram]
+
+    # ----- querying -----
+
+    def _shortlist(
+        self,
+        query_grams: Set[str],
+        needed: int,
+        length: int,
+        keep: Optional[Callable[[List[int]], Set[int]]],
+    ) -> List[Tuple[int, Tuple[float, str]]]:
+        """The `length` kept products sharing the most query trigrams (ties: lower id)"""
+        size = len(query_grams)
+        by_rarity = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+        # Prefix filter: a name sharing `needed` trigrams contains at least one
+        # of the (len - needed + 1) rarest query trigrams.
+        rare, common = by_rarity[:size - needed + 1], by_rarity[size - needed + 1:]
+        overlaps: Counter = Counter()
+        for gram in rare:
+            overlaps.update(self._postings.get(gram, ()))
+        candidates = set(overlaps)
+        for gram in common:
+            overlaps.update(candidates & self._postings.get(gram, set()))
+
+        # Best-matching name per product, taking overlaps from the highest
+        # down until the shortlist can be filled
+        best: Dict[int, Tuple[int, str]] = {}
+        for level in sorted(set(overlaps.values()), reverse=True):
+            if level < needed or len(best) >= length:
+                break
+            found: Dict[int, str] = {}
+            for doc in [doc for doc, overlap in overlaps.items() if overlap == level]:
+                product_id, name, _ = self._docs[doc]
+                if product_id not in best:
+                    found.setdefault(product_id, name)
+            if keep is not None and found:
+                allowed = keep(list(found))
+                found = {product_id: name for product_id, name in found.items() if product_id in allowed}
+            for product_id, name in found.items():
+                best[product_id] = (level, name)
+        ranked = sorted(best, key=lambda product_id: (-best[product_id][0], product_id))
+        return [
+            (product_id, (best[product_id][0] / size, best[product_id][1]))
+            for product_id in ranked[:length]
+        ]
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        threshold: float,
+        count: int,
+        keep: Optional[Callable[[List[int]], Set[int]]] = None,
+    ) -> List[int]:
+        """Ids of the `count` products whose names resemble `query` most, best first.
+
+        `threshold` is the share of the query's trigrams a name must contain.
+        `keep(ids)`, when given, returns the matched ids that pass the caller's
+        filters; the others are skipped before the shortlist is cut.
+        """
+        normalized = normalize(query)
+        query_grams = trigrams(normalized)
+        if not query_grams:
+            return []
+
+        self.ensure_current(db)
+        with self._lock:
+            needed = max(1, math.ceil(threshold * len(query_grams)))
+            shortlist = self._shortlist(query_grams, needed, max(count, self.shortlist_size), keep)
+        return _top_by_distance(normalized, shortlist, count)
+
+
+def _top_by_distance(query: str, matches: Iterable[Tuple[int, Tuple[float, str]]], count: int) -> List[int]:
+    """Ids of the `count` matches closest to `query` (ties: higher similarity, lower id)"""
+    if count <= 0:
+        return []
+    masks = _char_masks(query)
+    # Max-heap of the best `count` so far; nothing further off than its top can get in
+    kept: List[Tuple[int, float, int]] = []
+    for product_id, (similarity, name) in matches:
+        bound = -kept[0][0] if len(kept) == count else len(query) + len(name)
+        distance = _best_window_distance(query, name, masks, bound)
+        entry = (-distance, similarity, -product_id)
+        if len(kept) < count:
+            heapq.heappush(kept, entry)
+        elif entry > kept[0]:
+            heapq.heapreplace(kept, entry)
+    return [-negated_id for _, _, negated_id in sorted(kept, reverse=True)]
+
+
+fuzzy_index = FuzzyProductIndex(refresh_seconds=get_settings().search_index_refresh_seconds)
+
@@ -0,0 +1,129 @@
+"""Size-bounded disk cache for resized image variants.
+
+Variants live as plain files in IMAGE_CACHE_DIR, named after the source
+image and the requested size/fit/format. Each worker keeps an in-memory LRU
+index of the directory (rebuilt from file mtimes on first use, and hits touch
+the file so the order survives restarts); files beyond `max_bytes` are
+evicted oldest first. Concurrent requests for the same missing variant share
+a single render.
+"""
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from .database import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class ImageVariantCache:
+    """LRU index over a directory of rendered variants, with single-flight renders"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "Optional[OrderedDict[str, int]]" = None
+        self._size = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, "asyncio.Task[str]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _load(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat_result = entry.stat()
+                    files.append((stat_result.st_mtime, entry.name, stat_result.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(files))
+        self._size = sum(self._entries.values())
+        self._evict()
+
+    def _evict(self) -> None:
+        # The newest entry stays even when it alone exceeds the budget: it is
+        # about to be served
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Path of a cached variant, marking it recently used"""
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            if name not in self._entries:
+                return None
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted by another worker
+                self._size -= self._entries.pop(name)
+                return None
+            self._entries.move_to_end(name)
+            return path
+
+    def add(self, name: str, size: int) -> None:
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            self._size -= self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._size += size
+            self._evict()
+
+    async def get(self, name: str, render: Callable[[str], Awaitable[int]]) -> str:
+        """Path of variant `name`, calling `render(path)` (which returns the size) on a miss"""
+        path = await run_in_threadpool(self.lookup, name)
+        if path is not None:
+            self.hits += 1
+            return path
+
+        task = self._inflight.get(name)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._render(name, render))
+            self._inflight[name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(name, None))
+        else:
+            self.coalesced += 1
+        # A cancelled request must not cancel the render others are waiting on
+        return await asyncio.shield(task)
+
+    async def _render(self, name: str, render: Callable[[str], Awaitable[int]]) -> str:
+        await run_in_threadpool(os.makedirs, self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        size = await render(path)
+        await run_in_threadpool(self.add, name, size)
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries) if self._entries is not None else 0,
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+image_variants = ImageVariantCache(settings.image_cache_dir, settings.image_cache_max_bytes)
@@ -0,0 +1,48 @@
+"""Which products and news show a given uploaded image.
+
+Product and news payloads embed the `Media` metadata of their `image` URL
+(see `image_meta` on the models), so a Media change only affects the rows
+that reference its URL. Caches and exports map Media commits to those rows
+instead of rebuilding everything on every upload.
+"""
+import logging
+from typing import Dict, Optional, Set
+from sqlalchemy.exc import SQLAlchemyError
+from .database import SessionLocal
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Models whose `image` column holds a Media URL
+IMAGE_MODELS = (models.Product, models.News)
+
+
+def image_references(media_ids: Optional[Set[int]]) -> Dict[type, Optional[Set[int]]]:
+    """Ids per model of the rows showing the given Media rows.
+
+    Models without referencing rows are left out. A model maps to None
+    (every row) when the affected images cannot be told: unknown ids, deleted
+    Media rows or a failed lookup.
+    """
+    everything = {model: None for model in IMAGE_MODELS}
+    if media_ids is None:
+        return everything
+
+    db = SessionLocal()
+    try:
+        rows = db.query(models.Media.id, models.Media.url).filter(models.Media.id.in_(media_ids)).all()
+        if len(rows) < len(media_ids):
+            # Deleted rows: their URLs are gone
+            return everything
+        urls = {url for _, url in rows if url}
+        references = {}
+        for model in IMAGE_MODELS:
+            ids = {row_id for (row_id,) in db.query(model.id).filter(model.image.in_(urls))} if urls else set()
+            if ids:
+                references[model] = ids
+        return references
+    except SQLAlchemyError as e:
+        logger.error(f"Could not look up rows showing media {sorted(media_ids)}: {e}")
+        return everything
+    finally:
+        db.close()
@@ -0,0 +1,244 @@
+"""Image processing off the event loop.
+
+CPU-heavy Pillow work runs in a shared process pool (`image_workers`) so
+resizing never blocks request handling. Derivatives of uploaded images are
+WebP files at the configured widths, written next to the original under
+``derivatives/`` and recorded on the `Media` row, along with the image's
+dimensions, dominant color and a tiny inline placeholder.
+"""
+import asyncio
+import base64
+import enum
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from PIL import Image, ImageOps
+from .database import SessionLocal, get_settings
+from . import models
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+DERIVATIVES_DIR = "derivatives"
+
+
+class ImageFit(str, enum.Enum):
+    CONTAIN = "contain"  # fit inside the box, keeping the aspect ratio
+    COVER = "cover"  # fill the box, cropping the overflow
+
+
+class ImageFormat(str, enum.Enum):
+    WEBP = "webp"
+    JPEG = "jpeg"
+    PNG = "png"
+
+
+MEDIA_TYPES = {
+    ImageFormat.WEBP: "image/webp",
+    ImageFormat.JPEG: "image/jpeg",
+    ImageFormat.PNG: "image/png",
+}
+
+
+class ImageWorkers:
+    """Lazily started process pool shared by all image jobs"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._executor is None:
+                # "spawn" keeps workers clear of the server's threads and locks
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor.submit(fn, *args)
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` in the pool and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+image_workers = ImageWorkers(max_workers=settings.image_workers)
+
+
+def make_derivatives(source_path: str, widths: Sequence[int], quality: int) -> List[Dict]:
+    """Write WebP copies of `source_path` at each width (runs in a worker process).
+
+    Widths at or above the original's are skipped; an image narrower than
+    every configured width still gets one WebP copy at its own size.
+    """
+    directory, name = os.path.split(source_path)
+    stem = os.path.splitext(name)[0]
+    out_dir = os.path.join(directory, DERIVATIVES_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+        targets = sorted({width for width in widths if 0 < width < image.width}) or [image.width]
+        derivatives = []
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            filename = f"{stem}-{width}w.webp"
+            path = os.path.join(out_dir, filename)
+            tmp_path = f"{path}.tmp"
+            resized.save(tmp_path, "WEBP", quality=quality, method=4)
+            os.replace(tmp_path, path)
+            derivatives.append({
+                "width": width,
+                "height": height,
+                "format": "webp",
+                "path": os.path.join(DERIVATIVES_DIR, filename),
+                "size": os.path.getsize(path),
+            })
+    return derivatives
+
+
+def resize_image(
+    source_path: str,
+    target_path: str,
+    width: Optional[int],
+    height: Optional[int],
+    fit: ImageFit,
+    image_format: ImageFormat,
+    quality: int,
+) -> int:
+    """Write a resized copy of `source_path` and return its size (runs in a worker process).
+
+    Images are never enlarged; `cover` needs both dimensions and otherwise
+    behaves like `contain`.
+    """
+    with Image.open(source_path) as original:
+        # JPEGs can be decoded at a fraction of their size when shrinking a lot.
+        # The draft box is in stored pixels; EXIF orientations 5-8 swap the axes
+        draft_width, draft_height = width, height
+        if original.getexif().get(0x0112) in (5, 6, 7, 8):
+            draft_width, draft_height = height, width
+        original.draft("RGB", (draft_width or original.width, draft_height or original.height))
+        image = ImageOps.exif_transpose(original)
+        if fit == ImageFit.COVER and width and height:
+            shrink = min(1.0, image.width / width, image.height / height)
+            image = ImageOps.fit(image, (max(1, round(width * shrink)), max(1, round(height * shrink))), Image.LANCZOS)
+        else:
+            image.thumbnail((width or image.width, height or image.height), Image.LANCZOS)
+
+        keeps_alpha = image_format != ImageFormat.JPEG and image.has_transparency_data
+        if image.mode not in ("RGB", "RGBA") or (image.mode == "RGBA" and not keeps_alpha):
+            image = image.convert("RGBA" if keeps_alpha else "RGB")
+
+        # Unique per process: other workers may be rendering the same variant
+        tmp_path = f"{target_path}.{os.getpid()}.tmp"
+        options = {"optimize": True} if image_format == ImageFormat.PNG else {"quality": quality}
+        image.save(tmp_path, image_format.value.upper(), **options)
+        os.replace(tmp_path, target_path)
+    return os.path.getsize(target_path)
+
+
+def read_metadata(source_path: str, placeholder_size: int) -> Dict:
+    """Dimensions, dominant color and placeholder of an image (runs in a worker process)"""
+    with Image.open(source_path) as original:
+        width, height = original.size
+        # EXIF orientations 5-8 are rotated by 90 degrees
+        if original.getexif().get(0x0112) in (5, 6, 7, 8):
+            width, height = height, width
+
+        # Decode JPEGs at reduced scale: only a few pixels are needed
+        original.draft("RGB", (placeholder_size * 4, placeholder_size * 4))
+        image = ImageOps.exif_transpose(original).convert("RGB")
+        image.thumbnail((placeholder_size, placeholder_size), Image.LANCZOS)
+
+    palette_image = image.quantize(colors=8)
+    _, index = max(palette_image.getcolors())
+    red, green, blue = palette_image.getpalette()[index * 3:index * 3 + 3]
+
+    buffer = io.BytesIO()
+    image.save(buffer, "WEBP", quality=40)
+    return {
+        "width": width,
+        "height": height,
+        "dominant_color": f"#{red:02x}{green:02x}{blue:02x}",
+        "placeholder": "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"),
+    }
+
+
+async def extract_metadata(source_path: str) -> Dict:
+    """Metadata columns for an uploaded image's Media row; {} on failure"""
+    try:
+        return await image_workers.run(read_metadata, source_path, settings.image_placeholder_size)
+    except Exception as e:
+        logger.error(f"Could not read image metadata of {source_path}: {e}")
+        return {}
+
+
+def backfill_image_metadata(batch_size: int = 50) -> int:
+    """Fill in metadata for images uploaded before it was recorded"""
+    done = 0
+    failed = set()
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(models.Media).filter(
+                models.Media.file_type == "image", models.Media.width.is_(None)
+            )
+            if failed:
+                query = query.filter(models.Media.id.notin_(failed))
+            rows = query.order_by(models.Media.id).limit(batch_size).all()
+            if not rows:
+                break
+            jobs = [
+                (media, image_workers.submit(read_metadata, media.file_path, settings.image_placeholder_size))
+                for media in rows
+            ]
+            for media, job in jobs:
+                try:
+                    for name, value in job.result().items():
+                        setattr(media, name, value)
+                    done += 1
+                except Exception as e:
+                    logger.warning(f"Could not read image metadata of {media.file_path}: {e}")
+                    failed.add(media.id)
+            db.commit()
+    except Exception as e:
+        logger.error(f"Image metadata backfill stopped: {e}")
+    finally:
+        db.close()
+    if done:
+        logger.info(f"Recorded metadata for {done} existing image(s)")
+    return done
+
+
+async def generate_derivatives(source_path: str) -> List[Dict]:
+    """Create the configured derivatives of an uploaded image; [] on failure"""
+    try:
+        return await image_workers.run(
+            make_derivatives, source_path, settings.image_derivative_widths, settings.image_webp_quality
+        )
+    except Exception as e:
+        logger.error(f"Could not create derivatives of {source_path}: {e}")
+        return []
+
+
+def srcset(base_url: str, derivatives: Optional[List[Dict]]) -> str:
+    """`srcset` attribute value for derivatives stored beside `base_url`'s directory"""
+    return ", ".join(
+        f"{base_url}/{item['path']} {item['width']}w" for item in derivatives or []
+    )
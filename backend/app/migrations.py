@@ -0,0 +1,157 @@
+"""Idempotent schema migrations applied at startup.
+
+Every migration has a unique name and runs once per database; applied names
+are recorded in the ``schema_migrations`` table. Steps must be safe to re-run
+(e.g. ``checkfirst``), since two workers may start at the same time.
+
+Run manually with ``python -m app.migrations``.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+from sqlalchemy import inspect, text, update
+from sqlalchemy.engine import Connection, Engine
+from .database import Base
+from . import models
+
+logger = logging.getLogger(__name__)
+
+
+# Indexes created by 0001, frozen as the models declared them when it shipped:
+# later model changes must not change what an old migration does
+HOT_PATH_INDEXES = {
+    "audit_logs": ["ix_audit_logs_created", "ix_audit_logs_entity_created", "ix_audit_logs_id"],
+    "careers": ["ix_careers_id"],
+    "categories": ["ix_categories_active_order", "ix_categories_id", "ix_categories_slug"],
+    "certificates": ["ix_certificates_id", "ix_certificates_order"],
+    "contact_messages": [
+        "ix_contact_messages_created", "ix_contact_messages_id", "ix_contact_messages_status_created",
+    ],
+    "job_applications": ["ix_job_applications_id"],
+    "media": ["ix_media_id"],
+    "news": ["ix_news_date", "ix_news_id", "ix_news_published_date", "ix_news_slug"],
+    "page_sections": ["ix_page_sections_id", "ix_page_sections_path_order"],
+    "partners": ["ix_partners_id"],
+    "products": [
+        "ix_products_active", "ix_products_active_category", "ix_products_active_featured",
+        "ix_products_category", "ix_products_id", "ix_products_slug",
+    ],
+    "site_settings": ["ix_site_settings_id"],
+    "users": ["ix_users_email", "ix_users_id", "ix_users_username"],
+}
+
+
+def _create_indexes(conn: Connection, table_name: str, names: List[str]) -> None:
+    """Create the named indexes of a model table unless they exist"""
+    indexes = {index.name: index for index in Base.metadata.tables[table_name].indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+def _create_hot_path_indexes(conn: Connection) -> None:
+    existing = set(inspect(conn).get_table_names())
+    for table_name, names in HOT_PATH_INDEXES.items():
+        if table_name in existing:
+            _create_indexes(conn, table_name, names)
+
+
+def _add_column(conn: Connection, table: str, name: str, ddl: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the table already has it"""
+    if name not in {column["name"] for column in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def _create_news_trending_scores(conn: Connection) -> None:
+    models.NewsTrendingScore.__table__.create(conn, checkfirst=True)
+
+
+def _add_media_derivatives(conn: Connection) -> None:
+    _add_column(conn, "media", "derivatives", "JSON")
+
+
+def _add_media_content_hash(conn: Connection) -> None:
+    _add_column(conn, "media", "content_hash", "VARCHAR(64)")
+    _create_indexes(conn, "media", ["ix_media_id", "ix_media_content_hash"])
+
+
+def _add_media_image_metadata(conn: Connection) -> None:
+    for name, ddl in [
+        ("url", "VARCHAR(500)"),
+        ("width", "INTEGER"),
+        ("height", "INTEGER"),
+        ("dominant_color", "VARCHAR(7)"),
+        ("placeholder", "TEXT"),
+    ]:
+        _add_column(conn, "media", name, ddl)
+    # Public URLs as the upload endpoints return them
+    conn.execute(text(
+        "UPDATE media SET url = '/uploads/' || "
+        "CASE file_type WHEN 'image' THEN 'images' WHEN 'pdf' THEN 'pdfs' ELSE file_type END "
+        "|| '/' || filename WHERE url IS NULL"
+    ))
+    _create_indexes(conn, "media", ["ix_media_url"])
+
+
+def _add_news_publish_scheduled(conn: Connection) -> None:
+    _add_column(conn, "news", "publish_scheduled", "BOOLEAN")
+    # Articles the publisher would still pick up: unpublished with a future date
+    news = models.News.__table__
+    conn.execute(
+        update(news)
+        .where(news.c.is_published == False, news.c.published_date > datetime.now(timezone.utc))
+        .values(publish_scheduled=True)
+    )
+
+
+def _add_media_updated_at(conn: Connection) -> None:
+    _add_column(conn, "media", "updated_at", "TIMESTAMP")
+
+
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_hot_path_indexes", _create_hot_path_indexes),
+    ("0002_news_trending_scores", _create_news_trending_scores),
+    ("0003_media_derivatives", _add_media_derivatives),
+    ("0004_media_content_hash", _add_media_content_hash),
+    ("0005_media_image_metadata", _add_media_image_metadata),
+    ("0006_news_publish_scheduled", _add_news_publish_scheduled),
+    ("0007_media_updated_at", _add_media_updated_at),
+]
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations in order and return their names.
+
+    All pending steps run in one transaction; if any fails it is rolled back
+    and the error is raised.
+    """
+    applied_now = []
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "name VARCHAR(255) PRIMARY KEY, "
+                "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            ))
+            applied = {row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+
+            for name, step in MIGRATIONS:
+                if name in applied:
+                    continue
+                step(conn)
+                conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+                applied_now.append(name)
+                logger.info(f"Applied migration {name}")
+    except Exception as e:
+        # Nothing was recorded; serving on a half-migrated schema is worse than not starting
+        logger.error(f"Schema migrations failed: {e}")
+        raise
+
+    return applied_now
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    names = run_migrations(engine)
+    print(f"Applied {len(names)} migration(s): {', '.join(names)}" if names else "Database is up to date")
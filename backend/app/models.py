@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Boolean, Column, Integer, Float, String, Text, DateTime, ForeignKey, Index, JSON, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -40,6 +40,9 @@ class User(Base):
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        Index("ix_categories_active_order", "is_active", "order", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name_ru = Column(String(255), nullable=False)
@@ -60,6 +63,13 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Catalog listings filter on these and page by id
+        Index("ix_products_active", "is_active", "id"),
+        Index("ix_products_active_category", "is_active", "category_id", "id"),
+        Index("ix_products_active_featured", "is_active", "featured", "id"),
+        Index("ix_products_category", "category_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
@@ -98,10 +108,18 @@ class Product(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     category = relationship("Category", back_populates="products")
+    # Joined (on the indexed media.url) so listings stay a single query
+    image_meta = relationship(
+        "Media", primaryjoin="foreign(Product.image) == Media.url", viewonly=True, uselist=False, lazy="joined"
+    )
 
 
 class News(Base):
     __tablename__ = "news"
+    __table_args__ = (
+        Index("ix_news_published_date", "is_published", "published_date", "id"),
+        Index("ix_news_date", "published_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -122,14 +140,32 @@ class News(Base):
     image = Column(String(500))
     published_date = Column(DateTime(timezone=True))
     is_published = Column(Boolean, default=False)
+    # Set when saved unpublished with a future published_date; cleared on publish
+    publish_scheduled = Column(Boolean, default=False)
     views = Column(Integer, default=0)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    image_meta = relationship(
+        "Media", primaryjoin="foreign(News.image) == Media.url", viewonly=True, uselist=False, lazy="joined"
+    )
+
+
+class NewsTrendingScore(Base):
+    """Snapshot of the time-decayed view score of an article (see app/trending.py)"""
+    __tablename__ = "news_trending_scores"
+
+    news_id = Column(Integer, ForeignKey("news.id", ondelete="CASCADE"), primary_key=True)
+    log_score = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 
 class Certificate(Base):
     __tablename__ = "certificates"
+    __table_args__ = (
+        Index("ix_certificates_order", "order", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -226,6 +262,10 @@ class Partner(Base):
 
 class ContactMessage(Base):
     __tablename__ = "contact_messages"
+    __table_args__ = (
+        Index("ix_contact_messages_status_created", "status", "created_at", "id"),
+        Index("ix_contact_messages_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -244,6 +284,12 @@ class ContactMessage(Base):
 
 class Media(Base):
     __tablename__ = "media"
+    __table_args__ = (
+        # Files are stored under their SHA-256, one row per distinct content
+        Index("ix_media_content_hash", "content_hash", unique=True),
+        # Product/News.image hold the public URL
+        Index("ix_media_url", "url"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -253,9 +299,20 @@ class Media(Base):
     file_type = Column(String(100))  # image, pdf, document
     mime_type = Column(String(100))
     file_size = Column(Integer)
+    content_hash = Column(String(64))
+    url = Column(String(500))
+    # Resized WebP copies: [{"width", "height", "format", "path", "size"}]
+    derivatives = Column(JSON)
+    # Images only: layout size and placeholder shown before the image loads
+    width = Column(Integer)
+    height = Column(Integer)
+    dominant_color = Column(String(7))  # "#rrggbb"
+    placeholder = Column(Text)  # tiny blurred WebP as a data: URI
     
     uploaded_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Moves when metadata is backfilled; Last-Modified of payloads embedding it
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
 class SiteSettings(Base):
@@ -298,6 +355,10 @@ class SiteSettings(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_entity_created", "entity_type", "created_at", "id"),
+        Index("ix_audit_logs_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -315,6 +376,9 @@ class AuditLog(Base):
 
 class PageSection(Base):
     __tablename__ = "page_sections"
+    __table_args__ = (
+        Index("ix_page_sections_path_order", "page_path", "order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     page_path = Column(String(255), nullable=False)  # e.g., "home", "about"
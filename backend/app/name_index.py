@@ -0,0 +1,129 @@
+"""Shared bookkeeping for in-memory indexes over product names.
+
+Subclasses store whatever structure they need per product; this base keeps
+it in step with the database. Commits in this process are applied
+incrementally through `app.signals`; writes from other worker processes are
+caught by a cheap table signature check every `refresh_seconds`.
+"""
+import gc
+import logging
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import List, Optional, Set
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .database import SessionLocal
+from . import models, signals
+
+logger = logging.getLogger(__name__)
+
+NAME_FIELDS = ("name_ru", "name_uz", "name_en")
+
+
+_indexes: List["ProductNameIndex"] = []
+
+
+class ProductNameIndex(ABC):
+    """Base class for product indexes rebuilt from a column query"""
+
+    columns = (models.Product.id,) + tuple(getattr(models.Product, name) for name in NAME_FIELDS)
+
+    def __init__(self, refresh_seconds: float = 30.0):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._built = False
+        self._signature = None
+        self._checked_at = 0.0
+        self._dirty_ids: Set[int] = set()
+        self._needs_rebuild = False
+        self._clear()
+        signals.connect(models.Product, self.mark_changed)
+        _indexes.append(self)
+
+    # ----- hooks for subclasses -----
+
+    @abstractmethod
+    def _clear(self) -> None:
+        """Reset to an empty index"""
+
+    @abstractmethod
+    def _add(self, row) -> None:
+        """Index one row of `_query()`"""
+
+    @abstractmethod
+    def _remove(self, product_id: int) -> None:
+        """Drop everything indexed for `product_id`"""
+
+    def _finish_rebuild(self) -> None:
+        """Called once every row has been added by a full rebuild"""
+
+    def _query(self, db: Session):
+        return db.query(*self.columns)
+
+    # ----- maintenance -----
+
+    def mark_changed(self, ids: Optional[Set[int]]) -> None:
+        """Record product changes; they are applied before the next lookup"""
+        with self._lock:
+            if ids is None:
+                self._needs_rebuild = True
+            else:
+                self._dirty_ids.update(ids)
+
+    def _table_signature(self, db: Session):
+        return db.query(
+            func.count(models.Product.id), func.max(models.Product.id), func.max(models.Product.updated_at)
+        ).one()
+
+    def _rebuild(self, db: Session) -> None:
+        self._clear()
+        for row in self._query(db).yield_per(2000):
+            self._add(row)
+        self._finish_rebuild()
+        # The rebuilt structures live until the next rebuild; keep full
+        # garbage collections from walking them on every request
+        gc.freeze()
+        self._built = True
+        self._needs_rebuild = False
+        self._dirty_ids.clear()
+
+    def _apply_dirty(self, db: Session) -> None:
+        ids = list(self._dirty_ids)
+        self._dirty_ids.clear()
+        for product_id in ids:
+            self._remove(product_id)
+        for row in self._query(db).filter(models.Product.id.in_(ids)):
+            self._add(row)
+
+    def ensure_current(self, db: Session) -> None:
+        """Build or update the index so it reflects the database"""
+        with self._lock:
+            now = time.monotonic()
+            if self._built and now - self._checked_at >= self.refresh_seconds:
+                # Catches writes made by other worker processes
+                self._checked_at = now
+                if self._table_signature(db) != self._signature:
+                    self._needs_rebuild = True
+
+            if not self._built or self._needs_rebuild:
+                self._signature = self._table_signature(db)
+                self._checked_at = now
+                self._rebuild(db)
+            elif self._dirty_ids:
+                self._apply_dirty(db)
+                self._signature = self._table_signature(db)
+
+
+def warm_name_indexes() -> None:
+    """Build every index ahead of its first lookup (run in a background thread)"""
+    db = SessionLocal()
+    try:
+        for index in _indexes:
+            try:
+                index.ensure_current(db)
+                logger.info(f"{index.__class__.__name__} ready")
+            except Exception as e:
+                logger.error(f"Could not build {index.__class__.__name__}: {e}")
+    finally:
+        db.close()
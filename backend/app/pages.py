@@ -0,0 +1,156 @@
+"""One-response bundles of everything a public page renders.
+
+A bundle holds the page's active sections, the site settings and the
+collections configured for that page in `settings.page_collections`
+(e.g. featured products on "home"). Each part is a cached, already serialized
+component; the bundle body is spliced together from those bytes and cached in
+the "pages" namespace. Commits touching any bundled model invalidate "pages"
+(see `cache.INVALIDATES`), after which the bundles of configured and recently
+requested pages are rebuilt in the background.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from .cache import CachedPayload, cached_payload, etag_for, make_key, render
+from .database import SessionLocal, get_settings
+from .projections import load_schema_columns
+from . import models, schemas, signals
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+COLLECTION_LIMIT = 8
+# Recently requested pages that are rebuilt after an edit, besides configured ones
+MAX_WARM_PAGES = 50
+# Edits arriving within this window trigger a single rebuild
+REBUILD_DELAY_SECONDS = 0.5
+
+
+def _featured_products(db: Session):
+    P = models.Product
+    return (
+        db.query(P).options(load_schema_columns(P, schemas.ProductSummary))
+        .filter(P.is_active == True, P.featured == True)
+        .order_by(P.id).limit(COLLECTION_LIMIT).all()
+    )
+
+
+def _latest_news(db: Session):
+    N = models.News
+    return (
+        db.query(N).options(load_schema_columns(N, schemas.NewsSummary))
+        .filter(N.is_published == True)
+        .order_by(N.published_date.desc().nulls_last(), N.id.desc())
+        .limit(COLLECTION_LIMIT).all()
+    )
+
+
+def _categories(db: Session):
+    C = models.Category
+    return db.query(C).filter(C.is_active == True).order_by(C.order, C.id).all()
+
+
+def _certificates(db: Session):
+    C = models.Certificate
+    return db.query(C).filter(C.is_active == True).order_by(C.order, C.id).all()
+
+
+# name -> (cache namespace, query, response schema)
+COLLECTIONS: Dict[str, Tuple[str, Callable[[Session], list], object]] = {
+    "featured_products": ("products", _featured_products, List[schemas.ProductSummary]),
+    "latest_news": ("news", _latest_news, List[schemas.NewsSummary]),
+    "categories": ("categories", _categories, List[schemas.CategoryResponse]),
+    "certificates": ("certificates", _certificates, List[schemas.CertificateResponse]),
+}
+
+
+def _sections(db: Session, page_path: str) -> CachedPayload:
+    def build():
+        S = models.PageSection
+        sections = db.query(S).filter(S.page_path == page_path, S.is_active == True).order_by(S.order).all()
+        return render(List[schemas.PageSectionResponse], sections)
+    return cached_payload("content", make_key("bundle", page_path), build)
+
+
+def _site_settings(db: Session) -> CachedPayload:
+    def build():
+        return render(Optional[schemas.SiteSettingsResponse], db.query(models.SiteSettings).first())
+    return cached_payload("settings", make_key("bundle"), build)
+
+
+def _collection(db: Session, name: str) -> CachedPayload:
+    namespace, query, schema = COLLECTIONS[name]
+    return cached_payload(namespace, make_key("bundle", name), lambda: render(schema, query(db)))
+
+
+class PageBundles:
+    """Builds, caches and pre-warms page bundles"""
+
+    def __init__(self, page_collections: Dict[str, List[str]]):
+        self.page_collections = page_collections
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def _assemble(self, db: Session, page_path: str) -> CachedPayload:
+        sections = _sections(db, page_path)
+        site_settings = _site_settings(db)
+        names = [name for name in self.page_collections.get(page_path, []) if name in COLLECTIONS]
+        collections = [(name, _collection(db, name)) for name in names]
+
+        parts = [sections, site_settings] + [payload for _, payload in collections]
+        body = b"".join([
+            b'{"page_path":', json.dumps(page_path).encode(),
+            b',"sections":', sections.body,
+            b',"settings":', site_settings.body,
+            b',"collections":{',
+            b",".join(json.dumps(name).encode() + b":" + payload.body for name, payload in collections),
+            b"}}",
+        ])
+        stamps = [part.last_modified for part in parts if part.last_modified is not None]
+        return CachedPayload(
+            body=body,
+            etag=etag_for(body),
+            last_modified=max(stamps) if stamps else None,
+        )
+
+    def get(self, db: Session, page_path: str) -> CachedPayload:
+        with self._lock:
+            self._recent[page_path] = None
+            self._recent.move_to_end(page_path)
+            while len(self._recent) > MAX_WARM_PAGES:
+                self._recent.popitem(last=False)
+        return cached_payload("pages", make_key(page_path), lambda: self._assemble(db, page_path))
+
+    def warm(self) -> None:
+        """Rebuild the bundles of configured and recently requested pages"""
+        with self._lock:
+            self._timer = None
+            pages = list(dict.fromkeys(list(self.page_collections) + list(self._recent)))
+        db = SessionLocal()
+        try:
+            for page_path in pages:
+                self.get(db, page_path)
+        except Exception as e:
+            logger.error(f"Could not rebuild page bundles: {e}")
+        finally:
+            db.close()
+
+    def schedule_warm(self, ids=None) -> None:
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(REBUILD_DELAY_SECONDS, self.warm)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+page_bundles = PageBundles(settings.page_collections)
+
+for _model in (models.PageSection, models.SiteSettings, models.Product, models.News,
+               models.Category, models.Certificate):
+    signals.connect(_model, page_bundles.schedule_warm)
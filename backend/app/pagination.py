@@ -0,0 +1,129 @@
+"""Keyset (cursor) pagination helpers for list endpoints.
+
+A cursor is an opaque, URL-safe token holding the sort key of the last row of
+the previous page. Filtering on that key instead of using OFFSET makes every
+page cost the same as the first one.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, literal, DateTime, String
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (column, descending)
+SortKey = Sequence[Tuple[object, bool]]
+
+
+def encode_cursor(values: List) -> str:
+    """Encode the sort key values of a row into an opaque cursor"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: SortKey) -> List:
+    """Decode a cursor back into typed sort key values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(sort):
+            raise ValueError("cursor length mismatch")
+        return [
+            datetime.fromisoformat(value) if value is not None and isinstance(col.type, DateTime) else value
+            for (col, _), value in zip(sort, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _bounds(col, value, dialect: Optional[str]):
+    """Lower/upper bind values matching `value` as it may be stored.
+
+    SQLite keeps datetimes as text, either "YYYY-MM-DD HH:MM:SS" (server
+    defaults) or with a ".ffffff" suffix (values written by SQLAlchemy), so a
+    whole-second value has to match both spellings.
+    """
+    if dialect == "sqlite" and isinstance(value, datetime):
+        text_value = value.strftime("%Y-%m-%d %H:%M:%S")
+        upper = f"{text_value}.{value.microsecond:06d}"
+        lower = text_value if value.microsecond == 0 else upper
+        return literal(lower, String()), literal(upper, String())
+    return value, value
+
+
+def _after(col, desc: bool, value, dialect: Optional[str]):
+    """Rows strictly after `value` in this column (NULLs sort last)"""
+    if value is None:
+        return None
+    lower, upper = _bounds(col, value, dialect)
+    return or_(col < lower if desc else col > upper, col.is_(None))
+
+
+def _equal(col, value, dialect: Optional[str]):
+    if value is None:
+        return col.is_(None)
+    lower, upper = _bounds(col, value, dialect)
+    if lower is upper:
+        return col == value
+    return and_(col >= lower, col <= upper)
+
+
+def keyset_filter(sort: SortKey, values: List, dialect: Optional[str] = None):
+    """Build the WHERE clause selecting rows that come after `values`"""
+    clauses = []
+    for i, (col, desc) in enumerate(sort):
+        after = _after(col, desc, values[i], dialect)
+        if after is None:
+            continue
+        prefix = [_equal(c, v, dialect) for (c, _), v in zip(sort[:i], values[:i])]
+        clauses.append(and_(*prefix, after))
+    return or_(*clauses)
+
+
+def order_by_keys(query: Query, sort: SortKey) -> Query:
+    """Apply a deterministic ORDER BY matching the cursor sort key"""
+    order = []
+    for col, desc in sort:
+        clause = col.desc() if desc else col.asc()
+        # NULLS LAST on a NOT NULL column only stops SQLite using an index for it
+        order.append(clause.nulls_last() if col.nullable else clause)
+    return query.order_by(*order)
+
+
+def paginate(
+    query: Query,
+    sort: SortKey,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    response: Optional[Response] = None,
+) -> Tuple[list, Optional[str]]:
+    """Fetch one page ordered by `sort`.
+
+    With a cursor the page starts right after it; otherwise `skip` is used as a
+    plain offset. Returns the rows and the cursor of the next page (if any),
+    which is also exposed in the X-Next-Cursor header when `response` is given.
+    """
+    query = order_by_keys(query, sort)
+
+    if cursor:
+        dialect = query.session.get_bind().dialect.name
+        query = query.filter(keyset_filter(sort, decode_cursor(cursor, sort), dialect))
+    elif skip:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, col.key) for col, _ in sort])
+
+    if response is not None and next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return rows, next_cursor
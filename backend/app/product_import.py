@@ -0,0 +1,180 @@
+"""Bulk product import from NDJSON or CSV.
+
+Rows are validated with `schemas.ProductCreate` and upserted by slug in
+batched transactions: one SELECT for the batch's existing slugs, one bulk
+INSERT and one bulk UPDATE per batch. Invalid rows are reported and skipped;
+a batch the database rejects is retried row by row so only the offending rows
+fail.
+"""
+import codecs
+import csv
+import json
+import logging
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from . import models, schemas
+
+logger = logging.getLogger(__name__)
+
+def _ndjson_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    row_number = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, row, None
+
+
+def _csv_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+    for row_number, row in enumerate(reader, start=1):
+        # CSV has no null: empty cells mean "not provided"
+        yield row_number, {key: value for key, value in row.items() if key and value != ""}, None
+
+
+def _format_errors(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors()
+    ]
+
+
+class ProductImporter:
+    """Validates rows and writes them in batches"""
+
+    def __init__(self, db: Session, batch_size: int = 500):
+        self.db = db
+        self.batch_size = batch_size
+        self.created = 0
+        self.updated = 0
+        self.errors: List[schemas.BulkImportError] = []
+        # Pre-loaded once so rows never trigger a category lookup
+        self.category_ids_by_slug: Dict[str, int] = dict(
+            db.query(models.Category.slug, models.Category.id).all()
+        )
+        self.category_ids = set(self.category_ids_by_slug.values())
+        self._batch: Dict[str, Tuple[int, schemas.ProductCreate]] = {}
+        self._unslugged: List[Tuple[int, schemas.ProductCreate]] = []
+
+    def add(self, row_number: int, row: dict) -> None:
+        category_slug = row.pop("category_slug", None)
+        if category_slug is not None and "category_id" not in row:
+            if category_slug not in self.category_ids_by_slug:
+                self.fail(row_number, row.get("slug"), [f"category_slug: unknown category '{category_slug}'"])
+                return
+            row["category_id"] = self.category_ids_by_slug[category_slug]
+
+        try:
+            product = schemas.ProductCreate.model_validate(row)
+        except ValidationError as e:
+            self.fail(row_number, row.get("slug"), _format_errors(e))
+            return
+
+        if product.category_id not in self.category_ids:
+            self.fail(row_number, product.slug, [f"category_id: category {product.category_id} not found"])
+            return
+
+        if product.slug:
+            # A repeated slug must see the earlier row already written
+            if product.slug in self._batch:
+                self.flush()
+            self._batch[product.slug] = (row_number, product)
+        else:
+            self._unslugged.append((row_number, product))
+
+        if len(self._batch) + len(self._unslugged) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        rows = list(self._batch.values()) + self._unslugged
+        self._batch, self._unslugged = {}, []
+        if not rows:
+            return
+
+        try:
+            created, updated = self._write(rows)
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning(f"Bulk product import batch failed, retrying row by row: {e}")
+            created, updated = self._write_each(rows)
+
+        self.created += created
+        self.updated += updated
+
+    def _write(self, rows: List[Tuple[int, schemas.ProductCreate]]) -> Tuple[int, int]:
+        """Upsert `rows` with one bulk INSERT and one bulk UPDATE; returns (created, updated)"""
+        slugs = [product.slug for _, product in rows if product.slug]
+        existing = dict(
+            self.db.query(models.Product.slug, models.Product.id)
+            .filter(models.Product.slug.in_(slugs))
+            .all()
+        ) if slugs else {}
+
+        inserts = []
+        updates = []
+        for _, product in rows:
+            if product.slug in existing:
+                # Only overwrite the columns the row actually provided
+                updates.append({"id": existing[product.slug], **product.model_dump(exclude_unset=True)})
+            else:
+                inserts.append(product.model_dump())
+
+        if inserts:
+            self.db.execute(insert(models.Product), inserts)
+        if updates:
+            self.db.execute(update(models.Product), updates)
+        return len(inserts), len(updates)
+
+    def _write_each(self, rows: List[Tuple[int, schemas.ProductCreate]]) -> Tuple[int, int]:
+        """Write rows one at a time, each in its own SAVEPOINT, so only the bad ones fail"""
+        created = updated = 0
+        for row_number, product in rows:
+            try:
+                with self.db.begin_nested():
+                    row_created, row_updated = self._write([(row_number, product)])
+            except SQLAlchemyError as e:
+                self.fail(row_number, product.slug, [f"Write failed: {e.__class__.__name__}"])
+                continue
+            created += row_created
+            updated += row_updated
+        self.db.commit()
+        return created, updated
+
+    def result(self) -> schemas.BulkImportResult:
+        return schemas.BulkImportResult(
+            created=self.created,
+            updated=self.updated,
+            failed=len(self.errors),
+            errors=sorted(self.errors, key=lambda error: error.row),
+        )
+
+    def fail(self, row_number: int, slug: Optional[str], messages: List[str]) -> None:
+        self.errors.append(schemas.BulkImportError(row=row_number, slug=slug, errors=messages))
+
+
+def import_products(db: Session, stream: IO[bytes], fmt: str, batch_size: int = 500) -> schemas.BulkImportResult:
+    """Import every row of `stream` and return per-row results"""
+    importer = ProductImporter(db, batch_size)
+    rows = _csv_rows(stream) if fmt == "csv" else _ndjson_rows(stream)
+
+    for row_number, row, error in rows:
+        if error:
+            importer.fail(row_number, None, [error])
+        else:
+            importer.add(row_number, row)
+
+    importer.flush()
+    return importer.result()
@@ -0,0 +1,20 @@
+"""Column projections for lean list responses (``view=summary``)."""
+import enum
+from sqlalchemy.orm import load_only
+from pydantic import BaseModel
+
+# Always loaded: Last-Modified and cursors read these, and a deferred column
+# would cost one lazy-load query per row
+_ALWAYS_LOADED = ("id", "created_at", "updated_at")
+
+
+class ListView(str, enum.Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+def load_schema_columns(model, schema: type, *extra):
+    """Loader option that SELECTs only the columns `schema` serializes"""
+    mapped = model.__table__.columns
+    names = [name for name in list(schema.model_fields) + list(_ALWAYS_LOADED) if name in mapped]
+    return load_only(*dict.fromkeys(getattr(model, name) for name in names), *extra)
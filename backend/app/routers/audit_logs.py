@@ -4,14 +4,18 @@ from typing import List, Optional
 from app.database import get_db
 from app import models
 from app.dependencies import get_current_user, require_role
+from app.pagination import paginate
 
 router = APIRouter(prefix="/api/audit-logs", tags=["Audit Logs"])
 
+AUDIT_LOG_SORT = [(models.AuditLog.created_at, True), (models.AuditLog.id, True)]
+
 @router.get("")
 def get_audit_logs(
     limit: int = 50,
     offset: int = 0,
     entity_type: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_role(models.UserRole.ADMIN))
 ):
@@ -21,10 +25,11 @@ def get_audit_logs(
     if entity_type:
         query = query.filter(models.AuditLog.entity_type == entity_type)
         
-    logs = query.order_by(models.AuditLog.created_at.desc()).offset(offset).limit(limit).all()
+    logs, next_cursor = paginate(query, AUDIT_LOG_SORT, limit, cursor, offset)
     total = query.count()
     
     return {
         "items": logs,
-        "total": total
+        "total": total,
+        "next_cursor": next_cursor
     }
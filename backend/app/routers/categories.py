@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_db, get_settings
 from app import models, schemas
 from app.dependencies import require_role
+from app.pagination import paginate, NEXT_CURSOR_HEADER
+from app.cache import cached_response, make_key, render
 
 router = APIRouter(prefix="/api/categories", tags=["Categories"])
+settings = get_settings()
+
+CACHE_CONTROL = settings.cache_control_categories
+
+CATEGORY_SORT = [(models.Category.order, False), (models.Category.id, False)]
 
 
 @router.get("/", response_model=List[schemas.CategoryResponse])
@@ -13,24 +20,35 @@ def get_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     is_active: bool = None,
+    cursor: Optional[str] = None,
+    request: Request = None,
     db: Session = Depends(get_db)
 ):
     """Get all categories"""
-    query = db.query(models.Category).order_by(models.Category.order)
+    def build():
+        query = db.query(models.Category)
+        
+        if is_active is not None:
+            query = query.filter(models.Category.is_active == is_active)
+        
+        categories, next_cursor = paginate(query, CATEGORY_SORT, limit, cursor, skip)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        return render(List[schemas.CategoryResponse], categories, headers)
     
-    if is_active is not None:
-        query = query.filter(models.Category.is_active == is_active)
-    
-    return query.offset(skip).limit(limit).all()
+    key = make_key("list", skip=skip, limit=limit, is_active=is_active, cursor=cursor)
+    return cached_response("categories", key, build, request, CACHE_CONTROL)
 
 
 @router.get("/{category_id}", response_model=schemas.CategoryResponse)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+def get_category(category_id: int, request: Request, db: Session = Depends(get_db)):
     """Get a single category"""
-    category = db.query(models.Category).filter(models.Category.id == category_id).first()
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    def build():
+        category = db.query(models.Category).filter(models.Category.id == category_id).first()
+        if not category:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return render(schemas.CategoryResponse, category)
+    
+    return cached_response("categories", make_key("id", category_id), build, request, CACHE_CONTROL)
 
 
 @router.post("/", response_model=schemas.CategoryResponse, status_code=201)
@@ -1,36 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app import models, schemas
-from app.database import get_db
+from app.database import get_db, get_settings
 from app.dependencies import get_current_user, require_role
+from app.pagination import paginate, NEXT_CURSOR_HEADER
+from app.cache import cached_response, make_key, render
 
 router = APIRouter(
     prefix="/api/certificates",
     tags=["certificates"]
 )
+settings = get_settings()
+
+CACHE_CONTROL = settings.cache_control_certificates
+
+CERTIFICATE_SORT = [(models.Certificate.order, False), (models.Certificate.id, False)]
 
 @router.get("/", response_model=List[schemas.CertificateResponse])
 def get_certificates(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    request: Request = None,
     db: Session = Depends(get_db)
 ):
-    certificates = db.query(models.Certificate).order_by(models.Certificate.order).offset(skip).limit(limit).all()
-    return certificates
+    def build():
+        certificates, next_cursor = paginate(
+            db.query(models.Certificate), CERTIFICATE_SORT, limit, cursor, skip
+        )
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        return render(List[schemas.CertificateResponse], certificates, headers)
+    
+    key = make_key("list", skip=skip, limit=limit, cursor=cursor)
+    return cached_response("certificates", key, build, request, CACHE_CONTROL)
 
 @router.get("/{certificate_id}", response_model=schemas.CertificateResponse)
 def get_certificate(
     certificate_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    certificate = db.query(models.Certificate).filter(models.Certificate.id == certificate_id).first()
-    if not certificate:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Certificate not found"
-        )
-    return certificate
+    def build():
+        certificate = db.query(models.Certificate).filter(models.Certificate.id == certificate_id).first()
+        if not certificate:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Certificate not found"
+            )
+        return render(schemas.CertificateResponse, certificate)
+    
+    return cached_response("certificates", make_key("id", certificate_id), build, request, CACHE_CONTROL)
 
 @router.post("/", response_model=schemas.CertificateResponse, status_code=status.HTTP_201_CREATED)
 def create_certificate(
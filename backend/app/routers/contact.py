@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db, get_settings
 from app import models, schemas
 from app.dependencies import require_role
+from app.pagination import paginate
+from app.bulk import bulk_update, bulk_delete
 import urllib.request
 import urllib.parse
 import json
@@ -13,6 +15,8 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/contact", tags=["Contact"])
 settings = get_settings()
 
+CONTACT_SORT = [(models.ContactMessage.created_at, True), (models.ContactMessage.id, True)]
+
 def send_telegram_notification(message_data: dict):
     """Send a notification to Telegram bot"""
     if not settings.telegram_bot_token or not settings.telegram_chat_id:
@@ -70,16 +74,43 @@ def get_contact_messages(
     skip: int = 0,
     limit: int = 50,
     status: str = None,
+    cursor: Optional[str] = None,
+    response: Response = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_role(models.UserRole.VIEWER))
 ):
-    """Get all contact messages (Admin panel)"""
-    query = db.query(models.ContactMessage).order_by(models.ContactMessage.created_at.desc())
+    """Get all contact messages (Admin panel, supports `cursor` pagination)"""
+    query = db.query(models.ContactMessage)
     
     if status:
         query = query.filter(models.ContactMessage.status == status)
     
-    return query.offset(skip).limit(limit).all()
+    messages, _ = paginate(query, CONTACT_SORT, limit, cursor, skip, response)
+    return messages
+
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_contact_messages(
+    bulk_data: schemas.ContactMessageBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(models.UserRole.EDITOR))
+):
+    """Update status/notes (e.g. archive) of all matching messages at once"""
+    update_data = bulk_data.update.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    return {"affected": bulk_update(db, models.ContactMessage, bulk_data, update_data)}
+
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_contact_messages(
+    bulk_data: schemas.ContactMessageBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(models.UserRole.ADMIN))
+):
+    """Delete all matching contact messages at once"""
+    return {"affected": bulk_delete(db, models.ContactMessage, bulk_data)}
 
 
 @router.put("/{message_id}", response_model=schemas.ContactMessageResponse)
@@ -1,46 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_settings
 from app import models, schemas
 from app.dependencies import get_current_user, require_role
+from app.cache import cached_response, make_key, render
 
 router = APIRouter(prefix="/api/content", tags=["Content Management"])
+settings = get_settings()
+
+CACHE_CONTROL = settings.cache_control_content
 
 
 @router.get("/sections", response_model=List[schemas.PageSectionResponse])
 def get_sections(
     page_path: Optional[str] = None,
     is_active: Optional[bool] = None,
+    request: Request = None,
     db: Session = Depends(get_db)
 ):
     """Get all page sections with optional filtering"""
-    print(f"DEBUG: get_sections called with page_path={page_path}, is_active={is_active}")
-    query = db.query(models.PageSection)
-    
-    if page_path:
-        query = query.filter(models.PageSection.page_path == page_path)
-    
-    if is_active is not None:
-        query = query.filter(models.PageSection.is_active == is_active)
+    def build():
+        query = db.query(models.PageSection)
+        
+        if page_path:
+            query = query.filter(models.PageSection.page_path == page_path)
+        
+        if is_active is not None:
+            query = query.filter(models.PageSection.is_active == is_active)
+        
+        sections = query.order_by(models.PageSection.order).all()
+        return render(List[schemas.PageSectionResponse], sections)
     
-    sections = query.order_by(models.PageSection.order).all()
-    print(f"DEBUG: Found {len(sections)} sections")
-    return sections
+    key = make_key("list", page_path=page_path or None, is_active=is_active)
+    return cached_response("content", key, build, request, CACHE_CONTROL)
 
 
 @router.get("/sections/{section_id}", response_model=schemas.PageSectionResponse)
-def get_section(section_id: int, db: Session = Depends(get_db)):
+def get_section(section_id: int, request: Request, db: Session = Depends(get_db)):
     """Get a single page section by ID"""
-    section = db.query(models.PageSection).filter(models.PageSection.id == section_id).first()
+    def build():
+        section = db.query(models.PageSection).filter(models.PageSection.id == section_id).first()
+        
+        if not section:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Section not found"
+            )
+        
+        return render(schemas.PageSectionResponse, section)
     
-    if not section:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Section not found"
-        )
-    
-    return section
+    return cached_response("content", make_key("id", section_id), build, request, CACHE_CONTROL)
 
 
 @router.post("/sections", response_model=schemas.PageSectionResponse, status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from app.database import get_db, get_settings
+from app.feeds import feeds, NEWS_RSS, SITEMAP_INDEX
+
+router = APIRouter(prefix="/api", tags=["Feeds"])
+settings = get_settings()
+
+CACHE_CONTROL = settings.cache_control_feeds
+
+
+def _serve(db: Session, request: Request, name: str, media_type: str):
+    payload = feeds.payload(db, name, media_type)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    return payload.to_response(request, CACHE_CONTROL)
+
+
+@router.get("/feeds/news.rss")
+def get_news_feed(request: Request, db: Session = Depends(get_db)):
+    """RSS 2.0 feed of the latest published news"""
+    return _serve(db, request, NEWS_RSS, "application/rss+xml")
+
+
+@router.get("/sitemap.xml")
+def get_sitemap_index(request: Request, db: Session = Depends(get_db)):
+    """Sitemap index pointing at the per-section sitemap chunks"""
+    return _serve(db, request, SITEMAP_INDEX, "application/xml")
+
+
+@router.get("/sitemaps/{name}")
+def get_sitemap(name: str, request: Request, db: Session = Depends(get_db)):
+    """One sitemap chunk listed in the sitemap index"""
+    if not name.startswith("sitemap-") or not name.endswith(".xml"):
+        raise HTTPException(status_code=404, detail="Sitemap not found")
+    return _serve(db, request, name, "application/xml")
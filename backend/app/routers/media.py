@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Tuple
+from email.utils import formatdate
+import os
+from app.cache import etag_for
+from app.database import get_settings
+from app.images import ImageFit, ImageFormat, MEDIA_TYPES, image_workers, resize_image
+from app.image_cache import image_variants
+
+router = APIRouter(prefix="/api/media", tags=["Media"])
+settings = get_settings()
+
+CACHE_CONTROL = settings.cache_control_images
+
+# Renders of a variant evicted (by any worker) before it could be read
+RENDER_ATTEMPTS = 3
+
+
+def _check_size(name: str, value: Optional[int], allowed) -> None:
+    # Arbitrary sizes would let clients fill the cache with useless variants
+    if value is not None and value not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{name} must be one of: {', '.join(str(size) for size in sorted(allowed))}"
+        )
+
+
+def _read_variant(path: str) -> Tuple[bytes, float]:
+    # Once open, the file stays readable even if it is evicted meanwhile
+    with open(path, "rb") as f:
+        return f.read(), os.fstat(f.fileno()).st_mtime
+
+
+@router.get("/image/{filename}")
+async def get_image_variant(
+    filename: str,
+    w: Optional[int] = None,
+    h: Optional[int] = None,
+    fit: ImageFit = ImageFit.CONTAIN,
+    image_format: ImageFormat = Query(ImageFormat.WEBP, alias="format")
+):
+    """Uploaded image resized to an allowed width/height (cached on disk)"""
+    if w is None and h is None:
+        raise HTTPException(status_code=400, detail="Give a width (w) and/or a height (h)")
+    _check_size("w", w, settings.image_resize_widths)
+    _check_size("h", h, settings.image_resize_heights)
+
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="Image not found")
+    source_path = os.path.join(settings.upload_dir, "images", filename)
+    if not await run_in_threadpool(os.path.isfile, source_path):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    # Keyed on the whole file name: logo.jpg and logo.png are different images
+    variant = f"{filename}_{w or 0}x{h or 0}_{fit.value}.{image_format.value}"
+
+    async def render(path: str) -> int:
+        return await image_workers.run(
+            resize_image, source_path, path, w, h, fit, image_format, settings.image_webp_quality
+        )
+
+    for _ in range(RENDER_ATTEMPTS):
+        try:
+            path = await image_variants.get(variant, render)
+        except OSError as e:
+            # Pillow cannot read the source
+            raise HTTPException(status_code=422, detail=f"Could not resize image: {e}")
+        try:
+            body, modified = await run_in_threadpool(_read_variant, path)
+        except FileNotFoundError:
+            # Evicted between the lookup and the read: the next get renders it again
+            continue
+        return Response(content=body, media_type=MEDIA_TYPES[image_format], headers={
+            "Cache-Control": CACHE_CONTROL,
+            "ETag": etag_for(body),
+            "Last-Modified": formatdate(modified, usegmt=True),
+        })
+    raise HTTPException(status_code=503, detail="Image cache is too busy, try again")
@@ -1,27 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from app.database import get_db
 from app import models, schemas
 from app.dependencies import require_role
+from app.pagination import paginate
+from app.bulk import bulk_update, bulk_delete
+from app.view_counter import news_views
+from app.scheduler import schedule_publication, scheduled_values
+from app.trending import trending_news
+from app.projections import ListView, load_schema_columns
 
 router = APIRouter(prefix="/api/news", tags=["News"])
 
+NEWS_SORT = [(models.News.published_date, True), (models.News.id, True)]
 
-@router.get("/", response_model=List[schemas.NewsResponse])
+
+@router.get("/", response_model=Union[List[schemas.NewsResponse], List[schemas.NewsSummary]])
 def get_news(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     is_published: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    view: ListView = ListView.FULL,
+    response: Response = None,
     db: Session = Depends(get_db)
 ):
-    """Get all news articles"""
-    query = db.query(models.News).order_by(models.News.published_date.desc())
+    """Get all news articles (newest first, supports `cursor` pagination).
+
+    `view=summary` skips the article bodies.
+    """
+    query = db.query(models.News)
+    if view == ListView.SUMMARY:
+        query = query.options(load_schema_columns(models.News, schemas.NewsSummary))
     
     if is_published is not None:
         query = query.filter(models.News.is_published == is_published)
     
-    return query.offset(skip).limit(limit).all()
+    news, _ = paginate(query, NEWS_SORT, limit, cursor, skip, response)
+    if view == ListView.SUMMARY:
+        return [schemas.NewsSummary.model_validate(item) for item in news]
+    return news
+
+
+@router.get("/trending", response_model=List[schemas.TrendingNewsResponse])
+def get_trending_news(limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+    """Get the most viewed published articles right now (views fade with a half-life)"""
+    # Over-fetch a little in case top entries were unpublished or deleted
+    ranked = trending_news.top(limit * 2)
+    if not ranked:
+        return []
+    
+    articles = {
+        news.id: news for news in db.query(models.News).filter(
+            models.News.id.in_([news_id for news_id, _ in ranked]),
+            models.News.is_published == True
+        )
+    }
+    items = []
+    for news_id, score in ranked:
+        if news_id in articles:
+            item = schemas.TrendingNewsResponse.model_validate(articles[news_id])
+            item.trending_score = round(score, 3)
+            items.append(item)
+    return items[:limit]
 
 
 @router.get("/{news_id}", response_model=schemas.NewsResponse)
@@ -31,11 +73,11 @@ def get_news_item(news_id: int, db: Session = Depends(get_db)):
     if not news:
         raise HTTPException(status_code=404, detail="News not found")
     
-    # Increment views
-    news.views += 1
-    db.commit()
-    
-    return news
+    # Views are buffered and written in batches, so reading stays read-only
+    item = schemas.NewsResponse.model_validate(news)
+    item.views = (news.views or 0) + news_views.record(news.id)
+    trending_news.record(news.id)
+    return item
 
 
 @router.post("/", response_model=schemas.NewsResponse, status_code=201)
@@ -46,12 +88,39 @@ def create_news(
 ):
     """Create a new news article"""
     new_news = models.News(**news_data.model_dump())
+    schedule_publication(new_news)
     db.add(new_news)
     db.commit()
     db.refresh(new_news)
     return new_news
 
 
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_news(
+    bulk_data: schemas.NewsBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(models.UserRole.EDITOR))
+):
+    """Update (e.g. publish) all news matching `ids`/`filter` at once"""
+    update_data = bulk_data.update.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    if "slug" in update_data:
+        raise HTTPException(status_code=400, detail="Slug is unique and cannot be bulk updated")
+    
+    return {"affected": bulk_update(db, models.News, bulk_data, scheduled_values(update_data))}
+
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_news(
+    bulk_data: schemas.NewsBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(models.UserRole.ADMIN))
+):
+    """Delete all news matching `ids`/`filter` at once"""
+    return {"affected": bulk_delete(db, models.News, bulk_data)}
+
+
 @router.put("/{news_id}", response_model=schemas.NewsResponse)
 def update_news(
     news_id: int,
@@ -64,8 +133,11 @@ def update_news(
     if not news:
         raise HTTPException(status_code=404, detail="News not found")
     
-    for field, value in news_data.model_dump(exclude_unset=True).items():
+    update_data = news_data.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(news, field, value)
+    if "is_published" in update_data or "published_date" in update_data:
+        schedule_publication(news)
     
     db.commit()
     db.refresh(news)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+from app.database import get_db, get_settings
+from app import schemas
+from app.pages import page_bundles
+
+router = APIRouter(prefix="/api/pages", tags=["Pages"])
+settings = get_settings()
+
+CACHE_CONTROL = settings.cache_control_pages
+
+
+@router.get("/{page_path}/bundle", response_model=schemas.PageBundle)
+def get_page_bundle(page_path: str, request: Request, db: Session = Depends(get_db)):
+    """Get a page's active sections, site settings and embedded collections in one response"""
+    return page_bundles.get(db, page_path).to_response(request, CACHE_CONTROL)
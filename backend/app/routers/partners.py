@@ -1,22 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app import models, schemas
 from app.database import get_db
 from app.dependencies import get_current_user, require_role
+from app.pagination import paginate
 
 router = APIRouter(
     prefix="/api/partners",
     tags=["partners"]
 )
 
+PARTNER_SORT = [(models.Partner.id, False)]
+
 @router.get("/", response_model=List[schemas.PartnerResponse])
 def get_partners(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    response: Response = None,
     db: Session = Depends(get_db)
 ):
-    partners = db.query(models.Partner).offset(skip).limit(limit).all()
+    partners, _ = paginate(db.query(models.Partner), PARTNER_SORT, limit, cursor, skip, response)
     return partners
 
 @router.get("/{partner_id}", response_model=schemas.PartnerResponse)
@@ -1,73 +1,231 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Union
+import tempfile
+from app.database import get_db, get_settings
 from app import models, schemas
 from app.dependencies import get_current_user, require_role
+from app.search import apply_product_search
+from app.fuzzy import fuzzy_index
+from app.suggest import product_suggestions
+from app.pagination import paginate, NEXT_CURSOR_HEADER
+from app.cache import cached_response, make_key, render
+from app.product_import import import_products
+from app.bulk import bulk_update, bulk_delete
+from app.projections import ListView, load_schema_columns
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
+settings = get_settings()
 
+CACHE_CONTROL = settings.cache_control_products
 
-@router.get("/", response_model=List[schemas.ProductResponse])
+PRODUCT_SORT = [(models.Product.id, False)]
+
+
+def _product_query(db: Session):
+    """Product query that loads the category in the same SELECT"""
+    return db.query(models.Product).options(joinedload(models.Product.category))
+
+
+def _get_product_or_404(db: Session, product_id: int) -> models.Product:
+    product = _product_query(db).filter(models.Product.id == product_id).first()
+    
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    return product
+
+
+def _normalize_search(search: Optional[str]) -> Optional[str]:
+    return " ".join(search.lower().split()) if search else None
+
+
+def _apply_filters(query, category_id=None, form=None, is_active=None, featured=None):
+    if category_id:
+        query = query.filter(models.Product.category_id == category_id)
+    
+    if form is not None:
+        query = query.filter(models.Product.form == form)
+    
+    if is_active is not None:
+        query = query.filter(models.Product.is_active == is_active)
+    
+    if featured is not None:
+        query = query.filter(models.Product.featured == featured)
+    
+    return query
+
+
+@router.get("/", response_model=Union[List[schemas.ProductResponse], List[schemas.ProductSummary]])
 def get_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     category_id: Optional[int] = None,
+    form: Optional[models.ProductForm] = None,
     is_active: Optional[bool] = None,
     featured: Optional[bool] = None,
     search: Optional[str] = None,
+    fuzzy: bool = False,
+    similarity: Optional[float] = Query(None, gt=0, le=1),
+    cursor: Optional[str] = None,
+    view: ListView = ListView.FULL,
+    request: Request = None,
     db: Session = Depends(get_db)
 ):
-    """Get all products with optional filtering"""
-    query = db.query(models.Product)
+    """Get all products with optional filtering.
+
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
+    With `fuzzy=true`, `search` matches product names with typos and in any
+    Cyrillic/Latin spelling; `similarity` overrides the match threshold.
+    `view=summary` returns lean list items without the long text fields.
+    """
+    search = _normalize_search(search)
+    if search and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor pagination is not supported for search results"
+        )
     
-    if category_id:
-        query = query.filter(models.Product.category_id == category_id)
+    if view == ListView.SUMMARY:
+        schema = List[schemas.ProductSummary]
+        base_query = db.query(models.Product).options(load_schema_columns(models.Product, schemas.ProductSummary))
+    else:
+        schema = List[schemas.ProductResponse]
+        base_query = _product_query(db)
     
-    if is_active is not None:
-        query = query.filter(models.Product.is_active == is_active)
+    def build():
+        query = _apply_filters(base_query, category_id, form, is_active, featured)
+        
+        if search and fuzzy:
+            threshold = similarity or settings.search_fuzzy_threshold
+            keep = None
+            if category_id or form is not None or is_active is not None or featured is not None:
+                def keep(ids):
+                    # The filters are applied to the matched ids before ranking
+                    return {
+                        product_id for (product_id,) in
+                        _apply_filters(db.query(models.Product.id), category_id, form, is_active, featured)
+                        .filter(models.Product.id.in_(ids))
+                    }
+            
+            # Only as many matches as the requested page reaches are ranked
+            ranked_ids = fuzzy_index.search(db, search, threshold, skip + limit, keep)
+            page_ids = ranked_ids[skip:skip + limit]
+            by_id = {p.id: p for p in query.filter(models.Product.id.in_(page_ids))} if page_ids else {}
+            return render(schema, [by_id[i] for i in page_ids if i in by_id])
+        
+        if search:
+            # Full-text search over all language columns, ordered by relevance
+            query = apply_product_search(query, search)
+            products = query.offset(skip).limit(limit).all()
+            return render(schema, products)
+        
+        products, next_cursor = paginate(query, PRODUCT_SORT, limit, cursor, skip)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        return render(schema, products, headers)
     
-    if featured is not None:
-        query = query.filter(models.Product.featured == featured)
+    key = make_key("list", view.value, skip=skip, limit=limit, category_id=category_id, form=form, is_active=is_active,
+                   featured=featured, search=search, fuzzy=fuzzy or None, similarity=similarity, cursor=cursor)
+    return cached_response("products", key, build, request, CACHE_CONTROL)
+
+
+@router.get("/facets", response_model=schemas.ProductFacets)
+def get_product_facets(
+    category_id: Optional[int] = None,
+    form: Optional[models.ProductForm] = None,
+    is_active: Optional[bool] = None,
+    featured: Optional[bool] = None,
+    search: Optional[str] = None,
+    request: Request = None,
+    db: Session = Depends(get_db)
+):
+    """Get catalog facet counts for the current filters/search.
+
+    Each facet is counted with every filter applied except its own, so the
+    sidebar can show how many products selecting another value would give.
+    All counts come from a single grouped query.
+    """
+    search = _normalize_search(search)
     
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (models.Product.name_ru.ilike(search_filter)) |
-            (models.Product.name_uz.ilike(search_filter)) |
-            (models.Product.name_en.ilike(search_filter))
+    def build():
+        P = models.Product
+        # Rows written outside the API may hold NULL flags; count them as False
+        is_active_flag = func.coalesce(P.is_active, False).label("is_active")
+        featured_flag = func.coalesce(P.featured, False).label("featured")
+        query = db.query(P.category_id, P.form, is_active_flag, featured_flag, func.count(P.id))
+        if search:
+            query = apply_product_search(query, search, ranked=False)
+        groups = query.group_by(P.category_id, P.form, is_active_flag, featured_flag).all()
+        
+        selected = {"category_id": category_id or None, "form": form, "is_active": is_active, "featured": featured}
+        
+        def matches(group, skip_facet=None):
+            return all(
+                value is None or facet == skip_facet or getattr(group, facet) == value
+                for facet, value in selected.items()
+            )
+        
+        def count_by(facet):
+            counts = {}
+            for group in groups:
+                if matches(group, skip_facet=facet):
+                    counts[getattr(group, facet)] = counts.get(getattr(group, facet), 0) + group[-1]
+            return counts
+        
+        facets = schemas.ProductFacets(
+            total=sum(group[-1] for group in groups if matches(group)),
+            categories=[{"category_id": k, "count": v} for k, v in sorted(count_by("category_id").items())],
+            forms=[{"form": k, "count": v} for k, v in sorted(count_by("form").items(), key=lambda item: item[0].value)],
+            is_active=[{"value": k, "count": v} for k, v in sorted(count_by("is_active").items())],
+            featured=[{"value": k, "count": v} for k, v in sorted(count_by("featured").items())],
         )
+        return render(schemas.ProductFacets, facets)
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    key = make_key("facets", category_id=category_id or None, form=form, is_active=is_active,
+                   featured=featured, search=search)
+    return cached_response("products", key, build, request, CACHE_CONTROL)
+
+
+@router.get("/suggest", response_model=List[schemas.ProductSuggestion])
+def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    """Get name completions for the search box (any language, featured first)"""
+    return product_suggestions.suggest(db, q, limit)
 
 
 @router.get("/{product_id}", response_model=schemas.ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(product_id: int, request: Request, db: Session = Depends(get_db)):
     """Get a single product by ID"""
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
-    
-    return product
+    return cached_response(
+        "products", make_key("id", product_id),
+        lambda: render(schemas.ProductResponse, _get_product_or_404(db, product_id)),
+        request, CACHE_CONTROL
+    )
 
 
 @router.get("/slug/{slug}", response_model=schemas.ProductResponse)
-def get_product_by_slug(slug: str, db: Session = Depends(get_db)):
+def get_product_by_slug(slug: str, request: Request, db: Session = Depends(get_db)):
     """Get a single product by slug"""
-    product = db.query(models.Product).filter(models.Product.slug == slug).first()
-    
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
+    def build():
+        product = _product_query(db).filter(models.Product.slug == slug).first()
+        
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        
+        return render(schemas.ProductResponse, product)
     
-    return product
+    return cached_response("products", make_key("slug", slug), build, request, CACHE_CONTROL)
 
 
 @router.post("/", response_model=schemas.ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -87,10 +245,89 @@ def create_product(
     
     new_product = models.Product(**product_data.model_dump())
     db.add(new_product)
+    db.flush()
+    product_id = new_product.id
     db.commit()
-    db.refresh(new_product)
     
-    return new_product
+    # Reload together with its category instead of refresh + lazy load
+    return _get_product_or_404(db, product_id)
+
+
+@router.post("/bulk", response_model=schemas.BulkImportResult)
+async def bulk_import_products(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(models.UserRole.EDITOR))
+):
+    """Create or update products in bulk from an NDJSON or CSV body (Editor/Admin only).
+
+    Rows are upserted by `slug`; `category_slug` may be given instead of
+    `category_id`. Invalid rows are skipped and reported in `errors`.
+    Bodies larger than MAX_FILE_SIZE are rejected with 413.
+    """
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "csv" if "csv" in content_type else "ndjson"
+
+    too_large = HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Import body too large")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.max_file_size:
+        raise too_large
+    
+    # Stream the body to a spooled file so large imports use bounded memory
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as body:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.max_file_size:
+                raise too_large
+            body.write(chunk)
+        body.seek(0)
+        
+        return await run_in_threadpool(import_products, db, body, import_format, batch_size)
+
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_products(
+    bulk_data: schemas.ProductBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(models.UserRole.EDITOR))
+):
+    """Update all products matching `ids`/`filter` at once (Editor/Admin only)"""
+    update_data = bulk_data.update.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    
+    if "slug" in update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Slug is unique and cannot be bulk updated"
+        )
+    
+    if "category_id" in update_data:
+        category = db.query(models.Category).filter(models.Category.id == update_data["category_id"]).first()
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Category not found"
+            )
+    
+    return {"affected": bulk_update(db, models.Product, bulk_data, update_data)}
+
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_products(
+    bulk_data: schemas.ProductBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(models.UserRole.ADMIN))
+):
+    """Delete all products matching `ids`/`filter` at once (Admin only)"""
+    return {"affected": bulk_delete(db, models.Product, bulk_data)}
 
 
 @router.put("/{product_id}", response_model=schemas.ProductResponse)
@@ -125,9 +362,8 @@ def update_product(
         setattr(product, field, value)
     
     db.commit()
-    db.refresh(product)
     
-    return product
+    return _get_product_or_404(db, product_id)
 
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
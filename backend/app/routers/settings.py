@@ -1,21 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, settings as app_settings
 from app import models, schemas
 from app.dependencies import get_current_user, require_role
+from app.site_settings import site_settings
 
 router = APIRouter(prefix="/api/settings", tags=["Settings"])
 
+CACHE_CONTROL = app_settings.cache_control_settings
+
 @router.get("", response_model=schemas.SiteSettingsResponse)
-def get_settings(db: Session = Depends(get_db)):
-    """Get site settings"""
-    settings = db.query(models.SiteSettings).first()
-    if not settings:
+def get_settings(request: Request):
+    """Get site settings (served from memory, no database session)"""
+    payload = site_settings.get()
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Settings not found"
         )
-    return settings
+    return payload.to_response(request, CACHE_CONTROL)
 
 @router.put("", response_model=schemas.SiteSettingsResponse)
 def update_settings(
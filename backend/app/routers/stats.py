@@ -3,6 +3,9 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
 from app.dependencies import get_current_user
+from app.cache import catalog_cache
+from app.image_cache import image_variants
+from app.static import uploads_served
 
 router = APIRouter(prefix="/api/stats", tags=["Statistics"])
 
@@ -26,3 +29,21 @@ def get_stats(db: Session = Depends(get_db), current_user: models.User = Depends
         "certificates": certificate_count,
         "partners": partner_count
     }
+
+
+@router.get("/cache")
+def get_cache_stats(current_user: models.User = Depends(get_current_user)):
+    """Get catalog cache counters (hits, misses, evictions) for sizing"""
+    return catalog_cache.stats()
+
+
+@router.get("/image-cache")
+def get_image_cache_stats(current_user: models.User = Depends(get_current_user)):
+    """Get resized image cache counters (hits, renders, coalesced requests, evictions)"""
+    return image_variants.stats()
+
+
+@router.get("/uploads")
+def get_upload_traffic_stats(current_user: models.User = Depends(get_current_user)):
+    """Get requests and bytes served from /uploads, per file type"""
+    return uploads_served.stats()
@@ -1,127 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
+import asyncio
 import os
-import shutil
-from datetime import datetime
 from pathlib import Path
 from app.database import get_db, get_settings
 from app import models
 from app.dependencies import require_role
-import secrets
+from app.images import extract_metadata, generate_derivatives, srcset
+from app.uploads import MULTIPART_FILE_BODY, ReceivedUpload, receive_upload
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/upload", tags=["Upload"])
 settings = get_settings()
 
+IMAGE_TYPES = ["image/jpeg", "image/png", "image/webp", "image/jpg"]
 
-def save_upload_file(upload_file: UploadFile, upload_dir: str) -> str:
-    """Save uploaded file and return the file path"""
-    # Create upload directory if it doesn't exist
-    Path(upload_dir).mkdir(parents=True, exist_ok=True)
-    
-    # Generate unique filename with random suffix
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    random_suffix = secrets.token_hex(4)
-    extension = Path(upload_file.filename).suffix
-    filename = f"{timestamp}_{random_suffix}{extension}"
-    file_path = os.path.join(upload_dir, filename)
-    
-    # Save file
+# Subdirectory of UPLOAD_DIR (and of /uploads) per media file type
+MEDIA_FOLDERS = {"image": "images", "pdf": "pdfs"}
+
+
+def content_filename(upload: ReceivedUpload) -> str:
+    """Content-addressed name: the SHA-256 of the bytes plus the original extension"""
+    return f"{upload.sha256}{Path(upload.filename).suffix.lower()}"
+
+
+def media_response(media: models.Media, deduplicated: bool) -> dict:
+    folder = MEDIA_FOLDERS.get(media.file_type, media.file_type)
+    response = {
+        "filename": media.filename,
+        "path": media.file_path,
+        "url": media.url or f"/uploads/{folder}/{media.filename}",
+        "deduplicated": deduplicated
+    }
+    if media.file_type == "image":
+        response["derivatives"] = media.derivatives or []
+        response["srcset"] = srcset(f"/uploads/{folder}", media.derivatives)
+        response["width"] = media.width
+        response["height"] = media.height
+        response["dominant_color"] = media.dominant_color
+        response["placeholder"] = media.placeholder
+    return response
+
+
+def find_media(db: Session, content_hash: str) -> Optional[dict]:
+    """Response for an already stored file with the same content, if any"""
+    media = db.query(models.Media).filter(models.Media.content_hash == content_hash).first()
+    return media_response(media, deduplicated=True) if media else None
+
+
+def record_media(db: Session, upload: ReceivedUpload, file_path: str, file_type: str, user_id: int, **extra) -> dict:
+    """Insert the Media row for a stored upload"""
+    media = models.Media(
+        filename=os.path.basename(file_path),
+        original_filename=upload.filename,
+        file_path=file_path,
+        url=f"/uploads/{MEDIA_FOLDERS[file_type]}/{os.path.basename(file_path)}",
+        file_type=file_type,
+        mime_type=upload.content_type,
+        file_size=upload.size,
+        content_hash=upload.sha256,
+        uploaded_by=user_id,
+        **extra
+    )
+    db.add(media)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-    except Exception as e:
-        logger.error(f"Failed to save file {file_path}: {e}")
-        raise HTTPException(status_code=500, detail="Could not save file")
-    
-    return file_path
+        db.commit()
+    except IntegrityError:
+        # The same content was stored by a concurrent upload
+        db.rollback()
+        existing = find_media(db, upload.sha256)
+        if existing is None:
+            raise
+        return existing
+    return media_response(media, deduplicated=False)
 
 
-@router.post("/image")
+async def store_upload(db: Session, upload: ReceivedUpload, file_type: str, user_id: int) -> dict:
+    """Keep a received upload under its content hash, reusing identical files"""
+    existing = await run_in_threadpool(find_media, db, upload.sha256)
+    if existing is not None:
+        await run_in_threadpool(upload.discard)
+        return existing
+
+    file_path = os.path.join(settings.upload_dir, MEDIA_FOLDERS[file_type], content_filename(upload))
+    await run_in_threadpool(upload.move_to, file_path)
+
+    extra = {}
+    if file_type == "image":
+        # Resized WebP copies and metadata are made in parallel in the image worker pool
+        derivatives, metadata = await asyncio.gather(generate_derivatives(file_path), extract_metadata(file_path))
+        extra = {"derivatives": derivatives, **metadata}
+    return await run_in_threadpool(record_media, db, upload, file_path, file_type, user_id, **extra)
+
+
+@router.post("/image", openapi_extra=MULTIPART_FILE_BODY)
 async def upload_image(
-    file: UploadFile = File(...),
+    request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_role(models.UserRole.EDITOR))
 ):
     """Upload an image file"""
-    # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/webp", "image/jpg"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Invalid file type. Only images allowed.")
-    
-    # Check file size
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > settings.max_file_size:
-        raise HTTPException(status_code=400, detail="File too large")
-    
-    # Save file
-    upload_dir = os.path.join(settings.upload_dir, "images")
-    file_path = save_upload_file(file, upload_dir)
-    
-    # Save to database
-    media = models.Media(
-        filename=os.path.basename(file_path),
-        original_filename=file.filename,
-        file_path=file_path,
-        file_type="image",
-        mime_type=file.content_type,
-        file_size=file_size,
-        uploaded_by=current_user.id
+    upload = await receive_upload(
+        request,
+        os.path.join(settings.upload_dir, MEDIA_FOLDERS["image"]),
+        settings.max_file_size,
+        allowed=lambda filename, content_type: content_type in IMAGE_TYPES,
+        invalid_detail="Invalid file type. Only images allowed."
     )
-    db.add(media)
-    db.commit()
-    
-    return {
-        "filename": os.path.basename(file_path),
-        "path": file_path,
-        "url": f"/uploads/images/{os.path.basename(file_path)}"
-    }
+    return await store_upload(db, upload, "image", current_user.id)
 
 
-@router.post("/pdf")
+@router.post("/pdf", openapi_extra=MULTIPART_FILE_BODY)
 async def upload_pdf(
-    file: UploadFile = File(...),
+    request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_role(models.UserRole.EDITOR))
 ):
     """Upload a PDF file"""
-    # Validate file type
-    is_pdf = file.content_type == "application/pdf" or file.filename.lower().endswith(".pdf")
-    if not is_pdf:
-        raise HTTPException(status_code=400, detail="Invalid file type. Only PDF allowed.")
-    
-    # Check file size
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > settings.max_file_size:
-        raise HTTPException(status_code=400, detail="File too large")
-    
-    # Save file
-    upload_dir = os.path.join(settings.upload_dir, "pdfs")
-    file_path = save_upload_file(file, upload_dir)
-    
-    # Save to database
-    media = models.Media(
-        filename=os.path.basename(file_path),
-        original_filename=file.filename,
-        file_path=file_path,
-        file_type="pdf",
-        mime_type=file.content_type,
-        file_size=file_size,
-        uploaded_by=current_user.id
+    upload = await receive_upload(
+        request,
+        os.path.join(settings.upload_dir, MEDIA_FOLDERS["pdf"]),
+        settings.max_file_size,
+        allowed=lambda filename, content_type: content_type == "application/pdf" or filename.lower().endswith(".pdf"),
+        invalid_detail="Invalid file type. Only PDF allowed."
     )
-    db.add(media)
-    db.commit()
-    
-    return {
-        "filename": os.path.basename(file_path),
-        "path": file_path,
-        "url": f"/uploads/pdfs/{os.path.basename(file_path)}"
-    }
+    return await store_upload(db, upload, "pdf", current_user.id)
@@ -0,0 +1,212 @@
+"""Scheduled publishing of news articles.
+
+An article is scheduled when it is saved unpublished with a `published_date`
+still in the future; `schedule_publication` records that in the
+`publish_scheduled` flag, which publishing consumes. Drafts and articles
+unpublished later on keep their past date but are never published by the
+scheduler.
+
+Scheduled articles are kept in a min-heap ordered by that date. A background
+thread sleeps until the earliest one is due and then publishes everything due
+with a single UPDATE through the ORM, so the usual commit signals invalidate
+derived caches and feeds. Readers keep filtering on `is_published` only.
+
+Dates are compared in UTC. `published_date` is converted to UTC when saved;
+naive values, whether sent by clients or read back from SQLite (which keeps no
+offset), are taken to be UTC already.
+
+Edits committed in this process reschedule the affected articles right away;
+articles scheduled by other workers are picked up by a full reload every
+`reload_seconds`. Several workers may race to publish the same article; the
+UPDATE only touches rows that are still scheduled, so that is harmless.
+"""
+import heapq
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import and_, false, update
+from .database import SessionLocal, get_settings
+from . import models, signals
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive datetimes are UTC (see the module docstring)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def schedule_publication(news: models.News) -> None:
+    """Normalize `published_date` to UTC and set `publish_scheduled` for a save.
+
+    Call it whenever `is_published` or `published_date` is set.
+    """
+    if news.published_date is not None:
+        news.published_date = _as_utc(news.published_date)
+    news.publish_scheduled = bool(
+        not news.is_published
+        and news.published_date is not None
+        and news.published_date > datetime.now(timezone.utc)
+    )
+
+
+def scheduled_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """`values` of a set-based UPDATE plus the matching `publish_scheduled` expression"""
+    if "is_published" not in values and "published_date" not in values:
+        return values
+    N = models.News
+    now = datetime.now(timezone.utc)
+    values = dict(values)
+    conditions = []
+    if "published_date" in values:
+        published_date = values["published_date"]
+        if published_date is None or _as_utc(published_date) <= now:
+            conditions.append(false())
+        else:
+            values["published_date"] = _as_utc(published_date)
+    else:
+        conditions.append(N.published_date > now)
+    if "is_published" in values:
+        if values["is_published"]:
+            conditions.append(false())
+    else:
+        conditions.append(N.is_published == False)
+    values["publish_scheduled"] = and_(*conditions) if conditions else True
+    return values
+
+
+class NewsPublisher:
+    """Publishes scheduled news when their published_date arrives"""
+
+    def __init__(self, reload_seconds: float):
+        self.reload_seconds = reload_seconds
+        self._heap: List[Tuple[datetime, int]] = []
+        self._changed: Set[int] = set()
+        self._reload = True
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def mark_changed(self, ids: Optional[Set[int]]) -> None:
+        """Reschedule the given articles (all of them when ids is None)"""
+        with self._condition:
+            if ids is None:
+                self._reload = True
+            else:
+                self._changed.update(ids)
+            self._condition.notify()
+
+    def upcoming(self) -> List[Tuple[datetime, int]]:
+        with self._condition:
+            return sorted(self._heap)
+
+    # ----- work done by the thread -----
+
+    def _scheduled(self, db, ids=None) -> List[Tuple[datetime, int]]:
+        N = models.News
+        query = db.query(N.published_date, N.id).filter(
+            N.is_published == False, N.publish_scheduled == True, N.published_date.isnot(None)
+        )
+        if ids is not None:
+            query = query.filter(N.id.in_(ids))
+        return [(_as_utc(published_date), news_id) for published_date, news_id in query]
+
+    def _refresh(self, reload: bool, changed: Set[int]) -> None:
+        db = SessionLocal()
+        try:
+            entries = self._scheduled(db, None if reload else list(changed))
+        finally:
+            db.close()
+        with self._condition:
+            if reload:
+                self._heap = entries
+                heapq.heapify(self._heap)
+            else:
+                # Stale entries of changed articles are re-checked when they come due
+                for entry in entries:
+                    heapq.heappush(self._heap, entry)
+
+    def _publish_due(self, now: datetime) -> int:
+        with self._condition:
+            due = set()
+            while self._heap and self._heap[0][0] <= now:
+                due.add(heapq.heappop(self._heap)[1])
+        if not due:
+            return 0
+
+        db = SessionLocal()
+        try:
+            # The heap may hold outdated dates; trust the current rows only
+            ids = [news_id for published_date, news_id in self._scheduled(db, list(due)) if published_date <= now]
+            if not ids:
+                return 0
+            db.execute(
+                update(models.News)
+                .where(models.News.id.in_(ids), models.News.is_published == False, models.News.publish_scheduled == True)
+                .values(is_published=True, publish_scheduled=False),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+            logger.info(f"Published scheduled news: {sorted(ids)}")
+            return len(ids)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Could not publish scheduled news {sorted(due)}: {e}")
+            with self._condition:
+                self._changed.update(due)
+            return 0
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        last_reload = None
+        while True:
+            with self._condition:
+                if self._stopping:
+                    return
+                now = datetime.now(timezone.utc)
+                if last_reload is None or (now - last_reload).total_seconds() >= self.reload_seconds:
+                    self._reload = True
+                reload, changed = self._reload, self._changed
+                self._reload, self._changed = False, set()
+
+            if reload or changed:
+                try:
+                    self._refresh(reload, changed)
+                    if reload:
+                        last_reload = now
+                except Exception as e:
+                    logger.error(f"Could not load scheduled news: {e}")
+                    last_reload = now
+
+            self._publish_due(datetime.now(timezone.utc))
+
+            with self._condition:
+                if self._stopping or self._reload or self._changed:
+                    continue
+                timeout = self.reload_seconds
+                if self._heap:
+                    until_due = (self._heap[0][0] - datetime.now(timezone.utc)).total_seconds()
+                    timeout = max(0.0, min(timeout, until_due))
+                self._condition.wait(timeout)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="news-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+news_publisher = NewsPublisher(get_settings().news_schedule_reload_seconds)
+
+signals.connect(models.News, news_publisher.mark_changed)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from app.models import UserRole, ProductForm
 
@@ -43,6 +43,24 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+# ============= Bulk Operation Schemas =============
+class BulkSelection(BaseModel):
+    """Rows targeted by a bulk operation: explicit ids and/or a filter"""
+    ids: Optional[List[int]] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        filter_values = getattr(self, "filter", None)
+        has_filter = filter_values is not None and filter_values.model_dump(exclude_none=True)
+        if not self.ids and not has_filter:
+            raise ValueError("Provide 'ids' or a non-empty 'filter'")
+        return self
+
+
+class BulkResult(BaseModel):
+    affected: int
+
+
 # ============= Category Schemas =============
 class CategoryBase(BaseModel):
     name_ru: str
@@ -83,6 +101,16 @@ class CategoryResponse(CategoryBase):
 
 
 # ============= Product Schemas =============
+class ImageMeta(BaseModel):
+    width: Optional[int] = None
+    height: Optional[int] = None
+    dominant_color: Optional[str] = None
+    placeholder: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 class ProductBase(BaseModel):
     category_id: int
     name_ru: str
@@ -142,11 +170,89 @@ class ProductResponse(ProductBase):
     slug: Optional[str] = None
     created_at: datetime
     category: CategoryResponse
+    image_meta: Optional[ImageMeta] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProductSummary(BaseModel):
+    id: int
+    slug: Optional[str] = None
+    category_id: int
+    name_ru: str
+    name_uz: str
+    name_en: Optional[str] = None
+    form: ProductForm
+    image: Optional[str] = None
+    image_meta: Optional[ImageMeta] = None
+    is_active: bool = True
+    featured: bool = False
+    created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class ProductBulkFilter(BaseModel):
+    category_id: Optional[int] = None
+    is_active: Optional[bool] = None
+    featured: Optional[bool] = None
+
+
+class ProductBulkUpdate(BulkSelection):
+    filter: Optional[ProductBulkFilter] = None
+    update: ProductUpdate
+
+
+class ProductBulkDelete(BulkSelection):
+    filter: Optional[ProductBulkFilter] = None
+
+
+class CategoryFacet(BaseModel):
+    category_id: int
+    count: int
+
+
+class FormFacet(BaseModel):
+    form: ProductForm
+    count: int
+
+
+class BooleanFacet(BaseModel):
+    value: bool
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    forms: List[FormFacet]
+    is_active: List[BooleanFacet]
+    featured: List[BooleanFacet]
+
+
+class ProductSuggestion(BaseModel):
+    id: int
+    slug: Optional[str] = None
+    name: str
+    language: str
+    featured: bool
+
+
+class BulkImportError(BaseModel):
+    row: int
+    slug: Optional[str] = None
+    errors: List[str]
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[BulkImportError]
+
+
 # ============= News Schemas =============
 class NewsBase(BaseModel):
     title_ru: str
@@ -188,11 +294,49 @@ class NewsResponse(NewsBase):
     id: int
     views: int
     created_at: datetime
+    image_meta: Optional[ImageMeta] = None
 
     class Config:
         from_attributes = True
 
 
+class NewsSummary(BaseModel):
+    id: int
+    title_ru: str
+    title_uz: str
+    title_en: Optional[str] = None
+    slug: str
+    excerpt_ru: Optional[str] = None
+    excerpt_uz: Optional[str] = None
+    excerpt_en: Optional[str] = None
+    image: Optional[str] = None
+    image_meta: Optional[ImageMeta] = None
+    published_date: Optional[datetime] = None
+    is_published: bool = False
+    views: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TrendingNewsResponse(NewsResponse):
+    trending_score: float = 0.0
+
+
+class NewsBulkFilter(BaseModel):
+    is_published: Optional[bool] = None
+
+
+class NewsBulkUpdate(BulkSelection):
+    filter: Optional[NewsBulkFilter] = None
+    update: NewsUpdate
+
+
+class NewsBulkDelete(BulkSelection):
+    filter: Optional[NewsBulkFilter] = None
+
+
 # ============= Certificate Schemas =============
 class CertificateBase(BaseModel):
     name_ru: str
@@ -399,6 +543,19 @@ class ContactMessageResponse(ContactMessageBase):
         from_attributes = True
 
 
+class ContactMessageBulkFilter(BaseModel):
+    status: Optional[str] = None
+
+
+class ContactMessageBulkUpdate(BulkSelection):
+    filter: Optional[ContactMessageBulkFilter] = None
+    update: ContactMessageUpdate
+
+
+class ContactMessageBulkDelete(BulkSelection):
+    filter: Optional[ContactMessageBulkFilter] = None
+
+
 class SiteSettingsUpdate(SiteSettingsBase):
     pass
 
@@ -467,3 +624,12 @@ class PageSectionResponse(PageSectionBase):
 
     class Config:
         from_attributes = True
+
+
+# ============= Page Bundle Schemas =============
+class PageBundle(BaseModel):
+    page_path: str
+    sections: List[PageSectionResponse]
+    settings: Optional[SiteSettingsResponse] = None
+    # Keyed by collection name, e.g. "featured_products" or "latest_news"
+    collections: Dict[str, List[Any]] = {}
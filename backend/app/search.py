@@ -0,0 +1,129 @@
+"""Full-text product search backed by an SQLite FTS5 shadow table.
+
+The ``products_fts`` virtual table is an external-content FTS5 index over every
+language column of ``products``. Triggers on ``products`` keep it in sync on
+insert/update/delete, so routers never have to touch it directly.
+"""
+import re
+import logging
+from typing import Optional
+from sqlalchemy import text, func, or_, table, column
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query
+from . import models
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "products_fts"
+
+# Indexed columns with their BM25 weights (names matter most)
+SEARCH_COLUMNS = [
+    ("name_ru", 10.0),
+    ("name_uz", 10.0),
+    ("name_en", 10.0),
+    ("composition_ru", 4.0),
+    ("composition_uz", 4.0),
+    ("composition_en", 4.0),
+    ("instructions_ru", 1.0),
+    ("instructions_uz", 1.0),
+    ("instructions_en", 1.0),
+    ("storage_conditions_ru", 0.5),
+    ("storage_conditions_uz", 0.5),
+    ("storage_conditions_en", 0.5),
+    ("side_effects_ru", 0.5),
+    ("side_effects_uz", 0.5),
+    ("side_effects_en", 0.5),
+]
+
+products_fts = table(FTS_TABLE, column("rowid"), column(FTS_TABLE))
+
+# Set by ensure_product_search_index() once the FTS table is known to exist
+fts_enabled = False
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _column_list(prefix: str = "") -> str:
+    return ", ".join(f"{prefix}{name}" for name, _ in SEARCH_COLUMNS)
+
+
+def ensure_product_search_index(engine: Engine) -> bool:
+    """Create the FTS5 table and sync triggers if missing (SQLite only)"""
+    global fts_enabled
+
+    if engine.dialect.name != "sqlite":
+        logger.info("Full-text index skipped: not an SQLite database")
+        return False
+
+    columns = _column_list()
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE}
+            ).first()
+
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{columns}, content='products', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            ))
+
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN "
+                f"INSERT INTO {FTS_TABLE}(rowid, {columns}) "
+                f"VALUES (new.id, {_column_list('new.')}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {_column_list('old.')}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON products BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {_column_list('old.')}); "
+                f"INSERT INTO {FTS_TABLE}(rowid, {columns}) "
+                f"VALUES (new.id, {_column_list('new.')}); END"
+            ))
+
+            if not exists:
+                # Index rows that were written before the table existed
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                logger.info("Built full-text index for products")
+    except Exception as e:
+        logger.error(f"Could not create full-text index, falling back to LIKE search: {e}")
+        fts_enabled = False
+        return False
+
+    fts_enabled = True
+    return True
+
+
+def build_match_expression(search: str) -> Optional[str]:
+    """Turn free user input into an FTS5 MATCH expression with prefix terms"""
+    terms = _TERM_RE.findall(search.lower())
+    if not terms:
+        return None
+    # Quote every term so FTS5 operators typed by users are treated as text
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def apply_product_search(query: Query, search: str, ranked: bool = True) -> Query:
+    """Filter a Product query by `search` and, if `ranked`, order it by relevance"""
+    match = build_match_expression(search) if fts_enabled else None
+
+    if match is None:
+        pattern = f"%{search}%"
+        return query.filter(or_(*(
+            getattr(models.Product, name).ilike(pattern) for name, _ in SEARCH_COLUMNS
+        )))
+
+    query = (
+        query.join(products_fts, products_fts.c.rowid == models.Product.id)
+        .filter(products_fts.c[FTS_TABLE].op("MATCH")(match))
+    )
+    if not ranked:
+        return query
+    rank = func.bm25(products_fts.c[FTS_TABLE], *(weight for _, weight in SEARCH_COLUMNS))
+    return query.order_by(rank, models.Product.id)
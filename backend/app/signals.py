@@ -0,0 +1,75 @@
+"""Commit-time change notifications for ORM models.
+
+Modules that keep derived state (caches, in-memory indexes, exported files)
+register a receiver per model with `connect()`. Receivers run after the
+session commits and get the set of changed primary keys, or ``None`` when
+the change came from a bulk statement and the affected ids are unknown.
+"""
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+Receiver = Callable[[Optional[Set[int]]], None]
+
+_receivers: Dict[type, List[Receiver]] = defaultdict(list)
+
+_CHANGES_KEY = "changed_models"
+
+
+def connect(model: type, receiver: Receiver) -> None:
+    """Call `receiver(ids)` after every commit that changed `model` rows"""
+    _receivers[model].append(receiver)
+
+
+def _mark(session: Session, model: type, ids: Optional[Set[int]]) -> None:
+    if model not in _receivers:
+        return
+    changes = session.info.setdefault(_CHANGES_KEY, {})
+    if model in changes and changes[model] is None:
+        return
+    if ids is None:
+        changes[model] = None
+    else:
+        changes.setdefault(model, set()).update(ids)
+
+
+def notify(model: type, ids: Optional[Set[int]] = None) -> None:
+    """Dispatch a change made outside the ORM (e.g. raw SQL) right away"""
+    for receiver in _receivers.get(model, []):
+        try:
+            receiver(ids)
+        except Exception as e:
+            logger.error(f"Change receiver {receiver} failed for {model.__name__}: {e}", exc_info=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        obj_id = getattr(obj, "id", None)
+        _mark(session, type(obj), {obj_id} if obj_id is not None else None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _mark(orm_execute_state.session, mapper.class_, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    for model, ids in changes.items():
+        notify(model, ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_CHANGES_KEY, None)
@@ -0,0 +1,91 @@
+"""In-memory copy of the SiteSettings row.
+
+The row is held as an immutable, pre-serialized payload and served without a
+database session. Every commit that touches SiteSettings (normally
+`update_settings`) bumps a version number kept in a small stamp file; each
+worker compares the file's identity (inode and mtime) on read and reloads the
+row only when it changed, so edits made through any worker reach all of them.
+"""
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional, Tuple
+from .cache import CachedPayload, render
+from .database import SessionLocal, get_settings
+from . import models, schemas, signals
+
+logger = logging.getLogger(__name__)
+
+VERSION_HEADER = "X-Settings-Version"
+
+
+class SiteSettingsStore:
+    """Versioned, pre-serialized SiteSettings shared through a stamp file"""
+
+    def __init__(self, stamp_path: str):
+        self.stamp_path = stamp_path
+        self._lock = threading.Lock()
+        self._payload: Optional[CachedPayload] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._loaded = False
+        self.version = 0
+
+    def _current_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat_result = os.stat(self.stamp_path)
+        except FileNotFoundError:
+            return None
+        return stat_result.st_ino, stat_result.st_mtime_ns
+
+    def _read_version(self) -> int:
+        try:
+            with open(self.stamp_path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump(self, ids=None) -> int:
+        """Record a change: increment the shared version and drop the local copy"""
+        with self._lock:
+            version = self._read_version() + 1
+            directory = os.path.dirname(os.path.abspath(self.stamp_path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".settings-version-")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(str(version))
+                os.replace(tmp_path, self.stamp_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._loaded = False
+            return version
+
+    def _load(self, stamp) -> None:
+        db = SessionLocal()
+        try:
+            row = db.query(models.SiteSettings).first()
+            version = self._read_version()
+            self._payload = render(
+                schemas.SiteSettingsResponse, row, {VERSION_HEADER: str(version)}
+            ) if row is not None else None
+        finally:
+            db.close()
+        self.version = version
+        self._stamp = stamp
+        self._loaded = True
+
+    def get(self) -> Optional[CachedPayload]:
+        """The current settings payload, or None when no settings row exists"""
+        stamp = self._current_stamp()
+        if self._loaded and stamp == self._stamp:
+            return self._payload
+        with self._lock:
+            if not self._loaded or stamp != self._stamp:
+                self._load(stamp)
+            return self._payload
+
+
+site_settings = SiteSettingsStore(get_settings().site_settings_version_file)
+
+signals.connect(models.SiteSettings, site_settings.bump)
@@ -0,0 +1,278 @@
+"""Pre-rendered JSON snapshots of public content, served as static files.
+
+After content changes, the public payloads are re-serialized into
+`settings.snapshots_dir` together with gzip (and, when the optional `brotli`
+package is installed, brotli) copies. Files are swapped in with an atomic
+rename, so readers always see a complete file. The directory is mounted at
+``/snapshots`` with `PrecompressedStaticFiles`:
+
+    settings.json, categories.json, certificates.json
+    content/<page_path>.json        active sections of a page
+    products/index.json             active products (summary view)
+    products/<slug or id>.json      one active product
+    news/index.json                 published news (summary view)
+    news/<slug or id>.json          one published article
+    pages/<page_path>.json          page bundles (see app/pages.py)
+
+Slugs and page paths are used as file names only when they are a single
+plain path component; other rows fall back to their id, other pages are
+skipped.
+
+Exports are driven by `app.signals` and debounced; single products and
+articles are rewritten only when their own rows, or the images they show,
+changed.
+"""
+import gzip
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Set
+from sqlalchemy.orm import Session, joinedload
+from .cache import render
+from .database import SessionLocal, get_settings
+from .image_refs import image_references
+from .pages import page_bundles
+from .projections import load_schema_columns
+from . import models, schemas, signals
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip copies are written without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+EXPORT_DELAY_SECONDS = 1.0
+# Temporary files this old are leftovers of a crashed export, not writes in flight
+STALE_TEMP_SECONDS = 300
+
+# Sections to re-export when a model changes
+DEPENDS_ON = {
+    models.SiteSettings: ("settings", "pages"),
+    models.Category: ("categories", "products", "pages"),
+    models.Certificate: ("certificates", "pages"),
+    models.PageSection: ("content", "pages"),
+    models.Product: ("products", "pages"),
+    models.News: ("news", "pages"),
+}
+# Sections with one file per row; changes with known ids only rewrite those files
+ITEM_SECTIONS = {models.Product: "products", models.News: "news"}
+
+
+def _file_name(value) -> Optional[str]:
+    """`value` if it is usable as one file name inside a section directory"""
+    name = str(value) if value is not None else ""
+    if not name or name.startswith(".") or "/" in name or "\\" in name or "\0" in name:
+        return None
+    return name
+
+
+class SnapshotExporter:
+    """Writes public payload snapshots and keeps them current"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        # section -> None (export all) or ids of changed rows
+        self._pending: Dict[str, Optional[Set[int]]] = {}
+        # section -> {row id: relative path} of the per-row files written
+        self._items: Dict[str, Dict[int, str]] = {}
+
+    # ----- files -----
+
+    def _path(self, relative_path: str) -> str:
+        root = os.path.realpath(self.directory)
+        path = os.path.realpath(os.path.join(root, relative_path))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f"Snapshot path outside {self.directory}: {relative_path}")
+        return path
+
+    def _write(self, relative_path: str, body: bytes) -> None:
+        path = self._path(relative_path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        variants = [("", body), (".gz", gzip.compress(body, 9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(body)))
+        # Compressed copies first, so the plain file never points at older ones
+        for suffix, content in reversed(variants):
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, path + suffix)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def _delete(self, relative_path: str) -> None:
+        path = self._path(relative_path)
+        for suffix in ("", ".gz", ".br"):
+            try:
+                os.unlink(path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def _prune(self, section: str, keep: Set[str]) -> None:
+        """Delete files of a per-row section that were not just written"""
+        directory = os.path.join(self.directory, section)
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            if name.startswith(".tmp-"):
+                # Other workers may be writing theirs right now
+                self._remove_stale(os.path.join(directory, name))
+                continue
+            base = name[:-3] if name.endswith((".gz", ".br")) else name
+            if f"{section}/{base}" not in keep:
+                self._delete(f"{section}/{base}")
+
+    def _remove_stale(self, path: str) -> None:
+        try:
+            if time.time() - os.path.getmtime(path) > STALE_TEMP_SECONDS:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    # ----- sections -----
+
+    def _export_simple(self, db: Session, section: str) -> None:
+        if section == "settings":
+            self._write("settings.json", render(
+                Optional[schemas.SiteSettingsResponse], db.query(models.SiteSettings).first()
+            ).body)
+        elif section == "categories":
+            C = models.Category
+            self._write("categories.json", render(
+                List[schemas.CategoryResponse], db.query(C).filter(C.is_active == True).order_by(C.order, C.id).all()
+            ).body)
+        elif section == "certificates":
+            C = models.Certificate
+            self._write("certificates.json", render(
+                List[schemas.CertificateResponse],
+                db.query(C).filter(C.is_active == True).order_by(C.order, C.id).all()
+            ).body)
+        elif section == "content":
+            S = models.PageSection
+            sections = db.query(S).filter(S.is_active == True).order_by(S.page_path, S.order).all()
+            by_page: Dict[str, list] = {}
+            for section_row in sections:
+                by_page.setdefault(section_row.page_path, []).append(section_row)
+            written = set()
+            for page_path, rows in by_page.items():
+                if _file_name(page_path) is None:
+                    logger.warning(f"Not exporting sections of page {page_path!r}: not a plain file name")
+                    continue
+                written.add(f"content/{page_path}.json")
+                self._write(f"content/{page_path}.json", render(List[schemas.PageSectionResponse], rows).body)
+            self._prune("content", written)
+        elif section == "pages":
+            written = set()
+            for page_path in page_bundles.page_collections:
+                if _file_name(page_path) is None:
+                    logger.warning(f"Not exporting bundle of page {page_path!r}: not a plain file name")
+                    continue
+                written.add(f"pages/{page_path}.json")
+                self._write(f"pages/{page_path}.json", page_bundles.get(db, page_path).body)
+            self._prune("pages", written)
+
+    def _export_items(self, db: Session, section: str, ids: Optional[Set[int]]) -> None:
+        if section == "products":
+            model, summary, detail = models.Product, schemas.ProductSummary, schemas.ProductResponse
+            visible = model.is_active == True
+            detail_query = db.query(model).options(joinedload(model.category))
+        else:
+            model, summary, detail = models.News, schemas.NewsSummary, schemas.NewsResponse
+            visible = model.is_published == True
+            detail_query = db.query(model)
+
+        index = db.query(model).options(load_schema_columns(model, summary)).filter(visible).order_by(model.id).all()
+        self._write(f"{section}/index.json", render(List[summary], index).body)
+
+        paths = self._items.setdefault(section, {})
+        if ids is not None:
+            for row_id in ids:
+                old_path = paths.pop(row_id, None)
+                if old_path:
+                    self._delete(old_path)
+            detail_query = detail_query.filter(model.id.in_(list(ids)))
+
+        written = {}
+        for row in detail_query.filter(visible).yield_per(500):
+            name = _file_name(row.slug)
+            # index.json is the section listing
+            written[row.id] = f"{section}/{row.id if name in (None, 'index') else name}.json"
+            self._write(written[row.id], render(detail, row).body)
+        paths.update(written)
+
+        if ids is None:
+            self._items[section] = written
+            self._prune(section, set(written.values()) | {f"{section}/index.json"})
+
+    def export(self, sections: Optional[Dict[str, Optional[Set[int]]]] = None) -> None:
+        """Export the given sections (all of them by default)"""
+        if sections is None:
+            sections = {section: None for names in DEPENDS_ON.values() for section in names}
+        with self._export_lock:
+            db = SessionLocal()
+            try:
+                for section, ids in sections.items():
+                    if section in ITEM_SECTIONS.values():
+                        self._export_items(db, section, ids)
+                    else:
+                        self._export_simple(db, section)
+            finally:
+                db.close()
+
+    # ----- change tracking -----
+
+    def _run_pending(self) -> None:
+        with self._lock:
+            self._timer = None
+            pending, self._pending = self._pending, {}
+        try:
+            self.export(pending)
+        except Exception as e:
+            logger.error(f"Snapshot export failed: {e}", exc_info=True)
+            with self._lock:
+                for section in pending:
+                    self._pending[section] = None
+            self._schedule()
+
+    def _schedule(self) -> None:
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(EXPORT_DELAY_SECONDS, self._run_pending)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def receiver(self, model):
+        def on_change(ids):
+            with self._lock:
+                for section in DEPENDS_ON[model]:
+                    row_ids = ids if ITEM_SECTIONS.get(model) == section else None
+                    if row_ids is None or (section in self._pending and self._pending[section] is None):
+                        self._pending[section] = None
+                    else:
+                        self._pending[section] = self._pending.get(section, set()) | row_ids
+            self._schedule()
+        return on_change
+
+    def on_media_change(self, ids) -> None:
+        """Re-export the products and news showing the changed images"""
+        for model, row_ids in image_references(ids).items():
+            self.receiver(model)(row_ids)
+
+
+snapshots = SnapshotExporter(settings.snapshots_dir)
+
+for _model in DEPENDS_ON:
+    signals.connect(_model, snapshots.receiver(_model))
+signals.connect(models.Media, snapshots.on_media_change)
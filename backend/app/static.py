@@ -0,0 +1,140 @@
+"""Static file serving helpers."""
+import mimetypes
+import os
+import re
+import stat
+import threading
+from typing import Any, Dict, Optional
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# Preferred first; the compressed copy of "<name>" is "<name><suffix>"
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def _accepted_encodings(scope: Scope) -> set:
+    accepted = set()
+    for part in Headers(scope=scope).get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(token.lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves a pre-compressed sibling (.br/.gz) when the client accepts it"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        # Byte ranges always refer to the uncompressed file
+        accepted = _accepted_encodings(scope) if "range" not in Headers(scope=scope) else set()
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            response = self.file_response(full_path, stat_result, scope)
+            response.headers["content-encoding"] = encoding
+            if response.status_code == 200:
+                media_type, _ = mimetypes.guess_type(path)
+                response.headers["content-type"] = media_type or "application/octet-stream"
+            response.headers["vary"] = "Accept-Encoding"
+            return response
+
+        response = await super().get_response(path, scope)
+        response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+# Content-addressed uploads (see app/routers/upload.py) and their derivatives
+HASHED_NAME = re.compile(r"^[0-9a-f]{64}(-\d+w)?\.")
+
+
+class UploadFileResponse(FileResponse):
+    """FileResponse reading large chunks: fewer thread hops and sends per
+    multi-megabyte PDF (single and multiple byte ranges are built in)"""
+
+    chunk_size = 256 * 1024
+
+
+class ServedBytes:
+    """Requests and body bytes sent, per file extension"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def add(self, kind: str, sent: int) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(kind, {"requests": 0, "bytes": 0})
+            counts["requests"] += 1
+            counts["bytes"] += sent
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {kind: dict(counts) for kind, counts in sorted(self._counts.items())}
+
+
+uploads_served = ServedBytes()
+
+# Upload types counted separately; anything else is counted as "other"
+COUNTED_KINDS = {"jpg", "jpeg", "png", "webp", "pdf"}
+# Responses that actually served (part of) a file, or confirmed a cached copy
+COUNTED_STATUSES = {200, 206, 304}
+
+
+class UploadStaticFiles(PrecompressedStaticFiles):
+    """Serving for /uploads: immutable caching of content-addressed names,
+    .br/.gz siblings, range requests and per-type byte counters"""
+
+    def __init__(
+        self,
+        *args,
+        cache_control: str,
+        immutable_cache_control: str,
+        served: Optional[ServedBytes] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+        self.immutable_cache_control = immutable_cache_control
+        self.served = served or uploads_served
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await super().__call__(scope, receive, send)
+
+        kind = os.path.splitext(scope["path"])[1].lstrip(".").lower()
+        if kind not in COUNTED_KINDS:
+            kind = "other"
+        status_code = None
+        sent = 0
+
+        async def counting_send(message) -> None:
+            nonlocal status_code, sent
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await super().__call__(scope, receive, counting_send)
+        finally:
+            if status_code in COUNTED_STATUSES:
+                self.served.add(kind, sent)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = UploadFileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        immutable = HASHED_NAME.match(os.path.basename(full_path)) is not None
+        response.headers["cache-control"] = self.immutable_cache_control if immutable else self.cache_control
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
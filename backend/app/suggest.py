@@ -0,0 +1,200 @@
+"""Prefix autocomplete over product names.
+
+Every word-start suffix of every active product name (all three languages) is
+folded with `fuzzy.normalize`, so Latin and Cyrillic input complete the same
+products, and kept in a burst trie: small leaves hold their entries as is and
+split into child nodes once they grow past `BUCKET_SIZE`. Every node caches
+the best completions below it, so a lookup is a walk down the prefix and,
+at most, one leaf scan, whatever the catalog size.
+"""
+import heapq
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from .database import get_settings
+from .fuzzy import normalize
+from .name_index import NAME_FIELDS, ProductNameIndex
+from . import models, schemas
+
+MAX_SUGGESTIONS = 20
+# Entries a leaf holds before it splits by the next character
+BUCKET_SIZE = 64
+
+# Lower score ranks first
+FEATURED_BONUS = 40
+MID_NAME_PENALTY = 20
+
+# (folded key, score, product id, language)
+Entry = Tuple[str, int, int, str]
+
+
+def _rank(entry: Entry):
+    return entry[1], entry[0], entry[2]
+
+
+def _top(entries: Iterable[Entry]) -> List[Entry]:
+    """Best entry per product, the `MAX_SUGGESTIONS` best first"""
+    best: Dict[int, Entry] = {}
+    for entry in entries:
+        current = best.get(entry[2])
+        if current is None or _rank(entry) < _rank(current):
+            best[entry[2]] = entry
+    return heapq.nsmallest(MAX_SUGGESTIONS, best.values(), key=_rank)
+
+
+class _Node:
+    """Trie node for the keys starting with one prefix"""
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        # None while the node is a leaf
+        self.children: Optional[Dict[str, "_Node"]] = None
+        # A leaf's entries, or the entries whose key ends at an inner node
+        self.entries: List[Entry] = []
+        # Best completions of the prefix (see `_top`)
+        self.top: List[Entry] = []
+
+    def refresh(self) -> None:
+        if self.children is None:
+            self.top = _top(self.entries)
+        else:
+            self.top = _top(chain(self.entries, *(child.top for child in self.children.values())))
+
+    def offer(self, entry: Entry) -> None:
+        """Update `top` for an entry added below this node"""
+        for position, current in enumerate(self.top):
+            if current[2] == entry[2]:
+                if _rank(current) <= _rank(entry):
+                    return
+                del self.top[position]
+                break
+        if len(self.top) < MAX_SUGGESTIONS or _rank(entry) < _rank(self.top[-1]):
+            self.top.append(entry)
+            self.top.sort(key=_rank)
+            del self.top[MAX_SUGGESTIONS:]
+
+    def split(self) -> None:
+        """Turn a full leaf into an inner node, splitting its children as needed"""
+        entries, self.entries, self.children = self.entries, [], {}
+        for entry in entries:
+            if len(entry[0]) == self.depth:
+                self.entries.append(entry)
+            else:
+                self.children.setdefault(entry[0][self.depth], _Node(self.depth + 1)).entries.append(entry)
+        for child in self.children.values():
+            if len(child.entries) > BUCKET_SIZE:
+                child.split()
+            child.refresh()
+
+
+class ProductSuggestIndex(ProductNameIndex):
+    """Burst trie of folded name keys for active products"""
+
+    columns = (models.Product.id, models.Product.slug, models.Product.featured) + tuple(
+        getattr(models.Product, name) for name in NAME_FIELDS
+    )
+
+    def _query(self, db: Session):
+        return db.query(*self.columns).filter(models.Product.is_active == True)
+
+    def _clear(self) -> None:
+        self._root = _Node(0)
+        # Cached tops are kept up to date once the rebuild is done
+        self._ready = False
+        self._products: Dict[int, Tuple[str, bool, Dict[str, str]]] = {}
+        self._entries_by_product: Dict[int, List[Entry]] = defaultdict(list)
+
+    def _add(self, row) -> None:
+        product_id, slug, featured, *names = row
+        featured = bool(featured)
+        self._products[product_id] = (slug, featured, {
+            field[-2:]: name for field, name in zip(NAME_FIELDS, names) if name
+        })
+        seen = set()
+        for field, name in zip(NAME_FIELDS, names):
+            words = normalize(name).split() if name else []
+            for position in range(len(words)):
+                key = " ".join(words[position:])
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = len(key) + (MID_NAME_PENALTY if position else 0) - (FEATURED_BONUS if featured else 0)
+                entry = (key, score, product_id, field[-2:])
+                self._entries_by_product[product_id].append(entry)
+                self._insert(entry)
+
+    def _insert(self, entry: Entry) -> None:
+        node = self._root
+        while node.children is not None and node.depth < len(entry[0]):
+            if self._ready:
+                node.offer(entry)
+            node = node.children.setdefault(entry[0][node.depth], _Node(node.depth + 1))
+        node.entries.append(entry)
+        if node.children is None and len(node.entries) > BUCKET_SIZE:
+            node.split()
+            if self._ready:
+                node.refresh()
+        elif self._ready:
+            node.offer(entry)
+
+    def _path(self, key: str) -> List[_Node]:
+        """Nodes from the root down to the one holding `key`"""
+        path = [self._root]
+        while path[-1].children is not None and path[-1].depth < len(key):
+            path.append(path[-1].children[key[path[-1].depth]])
+        return path
+
+    def _remove(self, product_id: int) -> None:
+        self._products.pop(product_id, None)
+        touched: Dict[int, _Node] = {}
+        for entry in self._entries_by_product.pop(product_id, []):
+            path = self._path(entry[0])
+            path[-1].entries.remove(entry)
+            touched.update((id(node), node) for node in path)
+        # Deepest first, so every node is refreshed from up-to-date children
+        for node in sorted(touched.values(), key=lambda node: -node.depth):
+            if any(entry[2] == product_id for entry in node.top):
+                node.refresh()
+
+    def _finish_rebuild(self) -> None:
+        # Children before parents
+        nodes, pending = [], [self._root]
+        while pending:
+            node = pending.pop()
+            nodes.append(node)
+            pending.extend((node.children or {}).values())
+        for node in reversed(nodes):
+            node.refresh()
+        self._ready = True
+
+    def _completions(self, prefix: str) -> List[Entry]:
+        node = self._root
+        while node.depth < len(prefix):
+            if node.children is None:
+                return _top(entry for entry in node.entries if entry[0].startswith(prefix))
+            node = node.children.get(prefix[node.depth])
+            if node is None:
+                return []
+        return node.top
+
+    def suggest(self, db: Session, query: str, limit: int = 8) -> List[schemas.ProductSuggestion]:
+        """Top `limit` completions for `query`, featured products first"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        self.ensure_current(db)
+        with self._lock:
+            entries = self._completions(prefix)
+
+            suggestions = []
+            for _, _, product_id, language in entries[:limit]:
+                slug, featured, names = self._products[product_id]
+                suggestions.append(schemas.ProductSuggestion(
+                    id=product_id, slug=slug, name=names[language], language=language, featured=featured
+                ))
+            return suggestions
+
+
+product_suggestions = ProductSuggestIndex(refresh_seconds=get_settings().search_index_refresh_seconds)
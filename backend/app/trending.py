@@ -0,0 +1,129 @@
+"""Time-decayed "popular now" ranking of news articles.
+
+Uses forward decay: a view at time t adds exp(λ·(t − EPOCH)) to an article's
+score, with λ derived from the configured half-life. Scores are kept as
+logarithms (combined with logaddexp), so they never need rescaling, and an
+article's rank only changes when it is viewed. That keeps an in-memory top
+list exact with O(capacity) work per view, and lets requests read the first k
+entries directly.
+
+Per-worker increments are merged into the ``news_trending_scores`` table every
+`snapshot_seconds` (sums of forward-decayed scores are additive), which also
+picks up views recorded by other workers, and the table is reloaded on
+startup.
+"""
+import logging
+import math
+import threading
+import time
+from bisect import insort
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Engine
+from .background import PeriodicFlusher
+from .database import engine, get_settings
+from . import models
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+# Snapshot rows whose current score drops below this are deleted
+MIN_SCORE = 0.01
+
+
+def _logaddexp(a: Optional[float], b: float) -> float:
+    if a is None:
+        return b
+    high, low = (a, b) if a > b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+class TrendingNews(PeriodicFlusher):
+    """Forward-decayed view scores with a ready-sorted top list"""
+
+    def __init__(self, bind: Engine, half_life_hours: float, snapshot_seconds: float, capacity: int = 100):
+        super().__init__("news-trending", snapshot_seconds)
+        self.bind = bind
+        self.decay = math.log(2) / (half_life_hours * 3600)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # news id -> log score (last snapshot plus local views since)
+        self._scores: Dict[int, float] = {}
+        # news id -> log score of local views not yet snapshotted
+        self._pending: Dict[int, float] = {}
+        # (-log score, news id), best first
+        self._top: List[Tuple[float, int]] = []
+
+    def _exponent(self, at: Optional[float] = None) -> float:
+        return self.decay * ((time.time() if at is None else at) - EPOCH)
+
+    def record(self, news_id: int) -> None:
+        """Count one view of `news_id` now"""
+        exponent = self._exponent()
+        with self._lock:
+            self._pending[news_id] = _logaddexp(self._pending.get(news_id), exponent)
+            previous = self._scores.get(news_id)
+            score = self._scores[news_id] = _logaddexp(previous, exponent)
+
+            if previous is not None and (-previous, news_id) in self._top:
+                self._top.remove((-previous, news_id))
+            elif len(self._top) >= self.capacity and -score >= self._top[-1][0]:
+                return
+            insort(self._top, (-score, news_id))
+            del self._top[self.capacity:]
+
+    def top(self, k: int) -> List[Tuple[int, float]]:
+        """The `k` best (news id, current score) pairs, best first"""
+        exponent = self._exponent()
+        with self._lock:
+            return [(news_id, math.exp(-negative - exponent)) for negative, news_id in self._top[:k]]
+
+    def _rebuild_top(self) -> None:
+        self._top = sorted((-score, news_id) for news_id, score in self._scores.items())[:self.capacity]
+
+    def load(self) -> None:
+        """Replace in-memory scores with the snapshot table plus unsaved local views"""
+        with self.bind.connect() as conn:
+            rows = conn.execute(select(
+                models.NewsTrendingScore.news_id, models.NewsTrendingScore.log_score
+            )).all()
+        with self._lock:
+            self._scores = dict(rows)
+            for news_id, score in self._pending.items():
+                self._scores[news_id] = _logaddexp(self._scores.get(news_id), score)
+            self._rebuild_top()
+
+    def flush(self) -> None:
+        """Merge local views into the snapshot table, then reload it"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+
+            table = models.NewsTrendingScore.__table__
+            try:
+                with self.bind.begin() as conn:
+                    if batch:
+                        stored = dict(conn.execute(
+                            select(table.c.news_id, table.c.log_score).where(table.c.news_id.in_(list(batch)))
+                        ).all())
+                        conn.execute(delete(table).where(table.c.news_id.in_(list(batch))))
+                        conn.execute(insert(table), [
+                            {"news_id": news_id, "log_score": _logaddexp(stored.get(news_id), score)}
+                            for news_id, score in batch.items()
+                        ])
+                    conn.execute(delete(table).where(table.c.log_score < self._exponent() + math.log(MIN_SCORE)))
+            except Exception as e:
+                logger.error(f"Could not snapshot trending news scores, will retry: {e}")
+                with self._lock:
+                    for news_id, score in batch.items():
+                        self._pending[news_id] = _logaddexp(self._pending.get(news_id), score)
+                return
+
+            self.load()
+
+
+settings = get_settings()
+
+trending_news = TrendingNews(engine, settings.trending_half_life_hours, settings.trending_snapshot_seconds)
@@ -0,0 +1,193 @@
+"""Streaming multipart uploads with bounded memory.
+
+The request body is parsed as it arrives instead of being spooled first: the
+file part is written chunk by chunk to a temporary file in the target
+directory (in a worker thread, never on the event loop) while its size is
+checked against the limit and its SHA-256 computed. Oversized uploads are
+rejected with 413 as soon as the limit is crossed; complete ones are moved
+into place with an atomic rename.
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+# Room for boundaries and part headers when checking Content-Length up front
+MULTIPART_OVERHEAD = 64 * 1024
+
+# OpenAPI description of the body, since handlers read the stream themselves
+MULTIPART_FILE_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+class _FileSink:
+    """Temporary file plus running size and hash of what was written"""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        self.file = os.fdopen(fd, "wb")
+        self.hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.hash.update(data)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def discard(self) -> None:
+        self.file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class ReceivedUpload:
+    """A fully received file waiting in its temporary location"""
+    filename: str
+    content_type: Optional[str]
+    size: int
+    sha256: str
+    temp_path: str
+
+    def move_to(self, path: str) -> None:
+        """Atomically rename the upload to `path` (same filesystem)"""
+        os.replace(self.temp_path, path)
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+
+
+async def receive_upload(
+    request: Request,
+    directory: str,
+    max_size: int,
+    allowed: Callable[[str, Optional[str]], bool],
+    invalid_detail: str,
+    field_name: str = "file",
+) -> ReceivedUpload:
+    """Stream the `field_name` file of a multipart request into `directory`.
+
+    `allowed(filename, content_type)` is checked from the part headers, before
+    any of the file is written. Other form fields are ignored.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise _too_large()
+
+    # Parser callbacks only record events (with a copy of each part's headers);
+    # they are handled between chunks
+    events: List[Tuple[str, Any]] = []
+    header: List[bytes] = [b"", b""]
+    headers = {}
+
+    def on_part_begin() -> None:
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header[0] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header[1] += data[start:end]
+
+    def on_header_end() -> None:
+        headers[header[0].lower()] = header[1]
+        header[0] = header[1] = b""
+
+    callbacks = {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": lambda: events.append(("headers", dict(headers))),
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", b"")),
+    }
+    parser = MultipartParser(boundary, callbacks)
+
+    sink: Optional[_FileSink] = None
+    receiving = False
+    received: Optional[ReceivedUpload] = None
+    filename = ""
+    part_type: Optional[str] = None
+    size = 0
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            pending = []
+            for kind, data in events:
+                if kind == "headers":
+                    part_headers = data
+                    _, options = parse_options_header(part_headers.get(b"content-disposition", b""))
+                    receiving = (
+                        received is None
+                        and options.get(b"name", b"").decode("utf-8", "replace") == field_name
+                        and b"filename" in options
+                    )
+                    if receiving:
+                        filename = options[b"filename"].decode("utf-8", "replace")
+                        part_type = part_headers.get(b"content-type", b"").decode("latin-1") or None
+                        if not allowed(filename, part_type):
+                            raise HTTPException(status_code=400, detail=invalid_detail)
+                        sink = await run_in_threadpool(_FileSink, directory)
+                elif kind == "data" and receiving:
+                    size += len(data)
+                    if size > max_size:
+                        raise _too_large()
+                    pending.append(data)
+                elif kind == "end" and receiving:
+                    receiving = False
+                    if pending:
+                        await run_in_threadpool(sink.write, b"".join(pending))
+                        pending = []
+                    await run_in_threadpool(sink.close)
+                    received = ReceivedUpload(filename, part_type, size, sink.hash.hexdigest(), sink.path)
+            events.clear()
+            if pending:
+                await run_in_threadpool(sink.write, b"".join(pending))
+        parser.finalize()
+    except BaseException as e:
+        if sink is not None:
+            await run_in_threadpool(sink.discard)
+        if isinstance(e, MultipartParseError):
+            raise HTTPException(status_code=400, detail="Malformed multipart body")
+        raise
+
+    if received is None:
+        if sink is not None:
+            await run_in_threadpool(sink.discard)
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    return received
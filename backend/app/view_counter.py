@@ -0,0 +1,68 @@
+"""Write-behind view counters.
+
+Reads only bump an in-memory counter; a background thread adds the
+accumulated counts to the database in one batched UPDATE every
+`flush_seconds`, and once more on shutdown. Counts are per worker process, so
+a crash loses at most one interval of views.
+"""
+import logging
+import threading
+from collections import Counter
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.engine import Engine
+from .background import PeriodicFlusher
+from .database import engine, get_settings
+from . import models
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter(PeriodicFlusher):
+    """Buffers increments of `model.views` and flushes them in batches"""
+
+    def __init__(self, model, bind: Engine, flush_seconds: float):
+        super().__init__(f"{model.__tablename__}-views", flush_seconds)
+        self.model = model
+        self.bind = bind
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def record(self, row_id: int) -> int:
+        """Count one view and return the views of `row_id` not yet written"""
+        with self._lock:
+            self._pending[row_id] += 1
+            return self._pending[row_id]
+
+    def pending(self, row_id: int) -> int:
+        with self._lock:
+            return self._pending.get(row_id, 0)
+
+    def flush(self) -> int:
+        """Write all buffered views; returns the number of rows updated"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, Counter()
+            if not batch:
+                return 0
+
+            table = self.model.__table__
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values(views=func.coalesce(table.c.views, 0) + bindparam("increment"))
+            )
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(statement, [
+                        {"row_id": row_id, "increment": increment} for row_id, increment in batch.items()
+                    ])
+            except Exception as e:
+                logger.error(f"Could not flush {table.name} views, will retry: {e}")
+                with self._lock:
+                    self._pending.update(batch)
+                return 0
+            return len(batch)
+
+
+news_views = ViewCounter(models.News, engine, get_settings().news_views_flush_seconds)
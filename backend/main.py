@@ -1,7 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from app.database import engine, Base, get_settings
+from app.search import ensure_product_search_index
+from app.migrations import run_migrations
+from app.name_index import warm_name_indexes
+from app.view_counter import news_views
+from app.trending import trending_news
+from app.scheduler import news_publisher
+from app.snapshots import snapshots
+from app.images import backfill_image_metadata, image_workers
+from app.static import PrecompressedStaticFiles, UploadStaticFiles
+from app.pagination import NEXT_CURSOR_HEADER
 from app.routers.auth import router as auth_router
 from app.routers.products import router as products_router
 from app.routers.categories import router as categories_router
@@ -15,7 +24,11 @@ from app.routers.settings import router as settings_router
 from app.routers.stats import router as stats_router
 from app.routers.audit_logs import router as audit_logs_router
 from app.routers.backup import router as backup_router
+from app.routers.feeds import router as feeds_router
+from app.routers.pages import router as pages_router
+from app.routers.media import router as media_router
 import os
+import threading
 
 # Create database tables
 # Base.metadata.create_all(bind=engine)
@@ -39,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 from fastapi import Request, status
@@ -69,11 +83,78 @@ async def log_requests(request: Request, call_next):
         logger.error(f"Request failed: {e}")
         raise e
 
+@app.on_event("startup")
+def apply_migrations():
+    """Bring indexes and other schema changes up to date"""
+    run_migrations(engine)
+
+
+@app.on_event("startup")
+def init_search_index():
+    """Make sure the product full-text index exists"""
+    ensure_product_search_index(engine)
+
+
+@app.on_event("startup")
+def init_name_indexes():
+    """Build the in-memory product name indexes without delaying startup"""
+    threading.Thread(target=warm_name_indexes, name="name-indexes", daemon=True).start()
+
+
+@app.on_event("startup")
+def start_view_counters():
+    """Start writing buffered news views and trending scores in the background"""
+    news_views.start()
+    try:
+        trending_news.load()
+    except Exception as e:
+        logger.error(f"Could not load trending news scores: {e}")
+    trending_news.start()
+
+
+@app.on_event("startup")
+def export_snapshots():
+    """Write fresh static snapshots of public content without delaying startup"""
+    threading.Thread(target=snapshots.export, name="snapshots", daemon=True).start()
+
+
+@app.on_event("startup")
+def backfill_images():
+    """Record dimensions and placeholders of older images without delaying startup"""
+    threading.Thread(target=backfill_image_metadata, name="image-metadata", daemon=True).start()
+
+
+@app.on_event("startup")
+def start_news_publisher():
+    """Publish scheduled news when their date arrives"""
+    news_publisher.start()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    """Stop background workers, writing what they still buffer"""
+    news_views.stop()
+    trending_news.stop()
+    news_publisher.stop()
+    image_workers.shutdown()
+
 # Create uploads directory
 os.makedirs(settings.upload_dir, exist_ok=True)
 
-# Mount static files for uploads
-app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
+# Mount static files for uploads (content-addressed names are cached as immutable)
+app.mount(
+    "/uploads",
+    UploadStaticFiles(
+        directory=settings.upload_dir,
+        cache_control=settings.cache_control_uploads,
+        immutable_cache_control=settings.cache_control_images,
+    ),
+    name="uploads"
+)
+
+# Pre-rendered public JSON (see app/snapshots.py)
+os.makedirs(settings.snapshots_dir, exist_ok=True)
+app.mount("/snapshots", PrecompressedStaticFiles(directory=settings.snapshots_dir), name="snapshots")
 
 # Include routers
 app.include_router(auth_router)
@@ -89,6 +170,9 @@ app.include_router(settings_router)
 app.include_router(stats_router)
 app.include_router(audit_logs_router)
 app.include_router(backup_router)
+app.include_router(feeds_router)
+app.include_router(pages_router)
+app.include_router(media_router)
 
 
 @app.get("/")
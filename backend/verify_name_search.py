@@ -0,0 +1,105 @@
+"""Check product name normalization and time name search on a large catalog.
+
+Runs against a throwaway in-memory SQLite database:
+    python verify_name_search.py
+"""
+import random
+import sys
+import time
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app import models
+from app.fuzzy import FuzzyProductIndex, normalize
+from app.suggest import ProductSuggestIndex
+
+CATALOG_SIZE = 50000
+SYLLABLES = ["pa", "ra", "se", "ta", "mol", "ib", "u", "pro", "fen", "as", "kor", "bin", "sit", "mon",
+             "no", "vit", "min", "lo", "rin", "dex", "a", "me", "tron", "i", "da", "zol", "kar", "bon"]
+
+# (a, b, whether both must normalize to the same form)
+NORMALIZATION_CASES = [
+    ("Парацетамол", "Paracetamol", True),
+    ("Ўзбекистон", "Oʻzbekiston", True),
+    ("Paracettamol", "Paracetamol", True),
+    ("Paracetamol 500", "Paracetamol 50", False),
+    ("Paracetamol 1000", "Paracetamol 10", False),
+]
+# A featured product added last sorts behind thousands of "par..." keys
+FEATURED_NAME = "Parazz"
+PREFIXES = ["par", "para", "paraz", "parazz"]
+QUERIES = ["paracetamol", "parasetamol 500", "ibuprofen", "vitamin", "kar bon", "pa", "lorin 250 mg"]
+
+
+def seed(db, count):
+    """Add products with names built from a small set of syllables (many shared trigrams)"""
+    rnd = random.Random(1)
+
+    def word():
+        return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+
+    category = models.Category(name_ru="Категория", name_uz="Kategoriya", slug="category")
+    db.add(category)
+    db.commit()
+    rows = []
+    for i in range(count):
+        name = word().capitalize()
+        if rnd.random() < 0.4:
+            name += " " + word()
+        if rnd.random() < 0.5:
+            name += f" {rnd.choice([50, 100, 250, 500, 1000])} mg"
+        rows.append(dict(category_id=category.id, name_ru=name, name_uz=name, slug=f"product-{i}",
+                         form=models.ProductForm.TABLET, featured=rnd.random() < 0.05))
+    rows.append(dict(category_id=category.id, name_ru=FEATURED_NAME, name_uz=FEATURED_NAME, slug="featured",
+                     form=models.ProductForm.TABLET, featured=True))
+    db.execute(insert(models.Product), rows)
+    db.commit()
+
+
+def main():
+    failed = False
+    for a, b, same in NORMALIZATION_CASES:
+        ok = (normalize(a) == normalize(b)) == same
+        relation = "==" if same else "!="
+        print(f"{'✓' if ok else '✗'} normalize({a!r}) {relation} normalize({b!r}): {normalize(a)!r}, {normalize(b)!r}")
+        failed = failed or not ok
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    seed(db, CATALOG_SIZE)
+
+    index = FuzzyProductIndex(refresh_seconds=3600)
+    started = time.perf_counter()
+    index.ensure_current(db)
+    print(f"Fuzzy index over {CATALOG_SIZE} products built in {time.perf_counter() - started:.1f} s")
+    for query in QUERIES:
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            index.search(db, query, 0.5, 100)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"  {query!r}: median {sorted(timings)[2]:.1f} ms for a page of 100")
+
+    suggestions = ProductSuggestIndex(refresh_seconds=3600)
+    suggestions.ensure_current(db)
+    for prefix in PREFIXES:
+        started = time.perf_counter()
+        names = [suggestion.name for suggestion in suggestions.suggest(db, prefix, 8)]
+        elapsed = (time.perf_counter() - started) * 1000
+        ok = FEATURED_NAME in names
+        print(f"{'✓' if ok else '✗'} suggest({prefix!r}) in {elapsed:.2f} ms: {names}")
+        failed = failed or not ok
+    db.close()
+
+    if failed:
+        print("✗ Name normalization or suggestions are wrong")
+        sys.exit(1)
+    print("✓ Name normalization keeps transliterations together and dosages apart")
+    print("✓ Featured products are suggested for every prefix of their name")
+
+
+if __name__ == "__main__":
+    main()
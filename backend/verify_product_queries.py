@@ -0,0 +1,81 @@
+"""Check that serializing a page of products costs a constant number of queries.
+
+Runs against a throwaway in-memory SQLite database:
+    python verify_product_queries.py
+"""
+import sys
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app import models
+from app.routers import products
+from app.projections import ListView
+
+PAGE_SIZE = 100
+
+
+def seed(db, start, count):
+    """Add products that each have their own category (worst case for lazy loading)"""
+    for i in range(start, start + count):
+        category = models.Category(name_ru=f"Категория {i}", name_uz=f"Kategoriya {i}", slug=f"category-{i}")
+        db.add(category)
+        db.add(models.Product(
+            category=category,
+            name_ru=f"Продукт {i}",
+            name_uz=f"Mahsulot {i}",
+            slug=f"product-{i}",
+            form=models.ProductForm.TABLET
+        ))
+    db.commit()
+
+
+def count_page_queries(engine, Session, view=ListView.FULL):
+    """Count SQL statements needed to load and serialize one product page"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db = Session()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        # Returns the serialized JSON response, so lazy loads would show up here
+        products.get_products(
+            skip=0, limit=PAGE_SIZE, category_id=None, is_active=None, featured=None,
+            search=None, fuzzy=False, similarity=None, cursor=None, view=view, db=db
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        db.close()
+
+    return len(statements)
+
+
+def main():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    seed(db, 0, 10)
+    db.close()
+    small = {view: count_page_queries(engine, Session, view) for view in ListView}
+
+    db = Session()
+    seed(db, 10, PAGE_SIZE - 10)
+    db.close()
+    full = {view: count_page_queries(engine, Session, view) for view in ListView}
+
+    failed = False
+    for view in ListView:
+        print(f"view={view.value}: queries for 10 products: {small[view]}, for {PAGE_SIZE} products: {full[view]}")
+        failed = failed or small[view] != full[view] or full[view] > 1
+    if failed:
+        print("✗ Product listing issues a query per product")
+        sys.exit(1)
+    print("✓ Product listing uses a constant number of queries")
+
+
+if __name__ == "__main__":
+    main()
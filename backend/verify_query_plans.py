@@ -0,0 +1,129 @@
+"""Check that the hot catalog/admin queries are served by indexes.
+
+Runs EXPLAIN QUERY PLAN for each query against a throwaway in-memory SQLite
+database migrated with `app.migrations`, and fails if any plan scans a whole
+table or sorts rows in a temporary B-tree instead of reading them in index order:
+    python verify_query_plans.py
+"""
+import re
+import sys
+from datetime import datetime
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app import models
+from app.migrations import run_migrations
+from app.pagination import keyset_filter, order_by_keys
+from app.routers.products import PRODUCT_SORT, _apply_filters, _product_query
+from app.routers.news import NEWS_SORT
+from app.routers.audit_logs import AUDIT_LOG_SORT
+from app.routers.contact import CONTACT_SORT
+from app.routers.categories import CATEGORY_SORT
+from app.routers.certificates import CERTIFICATE_SORT
+
+PAGE_SIZE = 100
+# "SCAN products" alone is a full table scan; "SCAN x USING INDEX" walks an index in order
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+
+
+def page(query, sort, cursor_values=None):
+    """Shape a query the way app.pagination.paginate() does"""
+    query = order_by_keys(query, sort)
+    if cursor_values is not None:
+        query = query.filter(keyset_filter(sort, cursor_values, "sqlite"))
+    return query.limit(PAGE_SIZE + 1)
+
+
+def hot_queries(db):
+    P, N, S = models.Product, models.News, models.PageSection
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    return {
+        "products: active": page(_apply_filters(_product_query(db), is_active=True), PRODUCT_SORT),
+        "products: active in category": page(
+            _apply_filters(_product_query(db), category_id=1, is_active=True), PRODUCT_SORT
+        ),
+        "products: active featured": page(
+            _apply_filters(_product_query(db), is_active=True, featured=True), PRODUCT_SORT
+        ),
+        "products: active featured in category": page(
+            _apply_filters(_product_query(db), category_id=1, is_active=True, featured=True), PRODUCT_SORT
+        ),
+        "products: category (admin)": page(_apply_filters(_product_query(db), category_id=1), PRODUCT_SORT),
+        "products: active, next page": page(
+            _apply_filters(_product_query(db), is_active=True), PRODUCT_SORT, [500]
+        ),
+        "products: by slug": _product_query(db).filter(P.slug == "paracetamol"),
+        "news: published": page(db.query(N).filter(N.is_published == True), NEWS_SORT),
+        "news: published, next page": page(
+            db.query(N).filter(N.is_published == True), NEWS_SORT, [now, 10]
+        ),
+        "news: all (admin)": page(db.query(N), NEWS_SORT),
+        "sections: page": db.query(S).filter(S.page_path == "home").order_by(S.order),
+        "sections: active on page": db.query(S).filter(S.page_path == "home", S.is_active == True).order_by(S.order),
+        "audit logs: entity type": page(
+            db.query(models.AuditLog).filter(models.AuditLog.entity_type == "product"), AUDIT_LOG_SORT
+        ),
+        "audit logs: all": page(db.query(models.AuditLog), AUDIT_LOG_SORT),
+        "contact: by status": page(
+            db.query(models.ContactMessage).filter(models.ContactMessage.status == "new"), CONTACT_SORT
+        ),
+        "contact: all": page(db.query(models.ContactMessage), CONTACT_SORT),
+        "categories: active": page(
+            db.query(models.Category).filter(models.Category.is_active == True), CATEGORY_SORT
+        ),
+        "certificates": page(db.query(models.Certificate), CERTIFICATE_SORT),
+    }
+
+
+def explain(engine, query):
+    """Run `query` with EXPLAIN QUERY PLAN prepended and return the plan lines"""
+    def prepend_explain(conn, cursor, statement, parameters, context, executemany):
+        return "EXPLAIN QUERY PLAN " + statement, parameters
+
+    event.listen(engine, "before_cursor_execute", prepend_explain, retval=True)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(query.statement).fetchall()
+    finally:
+        event.remove(engine, "before_cursor_execute", prepend_explain)
+    return [row[-1] for row in rows]
+
+
+def main():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    # Tables without their indexes, as in databases created before the migrations
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            conn.execute(CreateTable(table))
+    run_migrations(engine)
+
+    inspector = inspect(engine)
+    declared = {index.name for table in Base.metadata.sorted_tables for index in table.indexes}
+    created = {index["name"] for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+    if declared - created:
+        print(f"✗ Migrations did not create: {', '.join(sorted(declared - created))}")
+        sys.exit(1)
+    print(f"✓ Migrations created all {len(declared)} model indexes")
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    failures = 0
+    for name, query in hot_queries(db).items():
+        plan = explain(engine, query)
+        problems = [line for line in plan if FULL_SCAN.match(line) or "TEMP B-TREE" in line]
+        if problems:
+            failures += 1
+            print(f"✗ {name}: {'; '.join(plan)}")
+        else:
+            print(f"✓ {name}: {'; '.join(plan)}")
+    db.close()
+
+    if failures:
+        print(f"✗ {failures} hot quer{'y' if failures == 1 else 'ies'} not served by an index")
+        sys.exit(1)
+    print("✓ All hot queries use indexes")
+
+
+if __name__ == "__main__":
+    main()